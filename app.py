@@ -1,10 +1,8 @@
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 import os
 import gc
 import torch
-from ultralytics import YOLO
 import cv2
 import numpy as np
 from PIL import Image
@@ -12,20 +10,49 @@ import io
 import base64
 import logging
 import json
+import hashlib
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
+from detector import annotate, box_arrays
+from model_registry import ModelRegistry, parse_model_specs
+from runtime import cpu_budget, configure_threads, candidate_thread_counts, autotune
+from tracker import TrackerRegistry
+from history import DetectionHistory, DETECTION, FALSE_ALARM, BUCKET_FORMATS
+from assets import AssetBundle, PrecompressedStaticFiles
+from broadcast import StatsBroadcaster
+from columnar import EventLog
+from overload import OverloadController, parse_tiers
+from tracing import Trace, SlowRequestLog, TraceIdFilter, run_in_executor, sample_stacks
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(TraceIdFilter())
 logger = logging.getLogger(__name__)
 
 # Memory optimization settings
-torch.backends.cudnn.benchmark = True
 if torch.cuda.is_available():
+    torch.backends.cudnn.benchmark = True
     torch.cuda.empty_cache()
 
+# Thread configuration: split the cores between uvicorn workers instead of
+# letting torch and OpenCV each claim all of them. Each worker runs one
+# inference at a time (see inference_pool), so the budget is per process.
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", "1"))
+THREAD_BUDGET = cpu_budget(WEB_CONCURRENCY)
+THREAD_AUTOTUNE = os.environ.get("THREAD_AUTOTUNE", "0") == "1"
+configure_threads(
+    int(os.environ.get("TORCH_THREADS", THREAD_BUDGET)),
+    interop=int(os.environ.get("TORCH_INTEROP_THREADS", "1")),
+    cv2_threads=int(os.environ.get("CV2_THREADS", "1")),
+)
+
 app = FastAPI()
 
 # Create necessary directories
@@ -35,857 +62,535 @@ os.makedirs("static", exist_ok=True)
 STATS_FILE = "detection_stats.json"
 if not os.path.exists(STATS_FILE):
     with open(STATS_FILE, "w") as f:
-        json.dump({"detections": [], "total_detections": 0, "total_false_alarms": 0}, f)
-
-# Mount static files directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Global variable for model
-model = None
+        json.dump({"total_detections": 0, "total_false_alarms": 0}, f)
+
+# Indexed detection history; seeded from the JSON stats file on first run
+HISTORY_DB = os.environ.get("HISTORY_DB", "detection_history.db")
+HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", "365"))
+history = DetectionHistory(HISTORY_DB, retention_days=HISTORY_RETENTION_DAYS)
+with open(STATS_FILE, "r") as f:
+    legacy_stats = json.load(f)
+if "detections" in legacy_stats:
+    if history.is_empty():
+        history.import_legacy(legacy_stats["detections"])
+    # Events live in the history database now; the file only keeps the counters
+    del legacy_stats["detections"]
+    with open(STATS_FILE, "w") as f:
+        json.dump(legacy_stats, f)
+
+# Build hashed, precompressed frontend assets and mount static files directory
+frontend = AssetBundle(static_dir="static", url_prefix="/static")
+frontend.build()
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
+
+# Live stats feed for connected dashboards
+stats_feed = StatsBroadcaster(queue_size=int(os.environ.get("STATS_STREAM_QUEUE", "16")))
+
+# Columnar log of every detection for analytics jobs (needs pyarrow)
+EVENTS_DIR = os.environ.get("EVENTS_DIR", "events")
+try:
+    event_log = EventLog(
+        EVENTS_DIR,
+        max_bytes=int(os.environ.get("EVENTS_SEGMENT_MB", "64")) * 1024 * 1024,
+        max_seconds=float(os.environ.get("EVENTS_SEGMENT_SECONDS", "3600")),
+        batch_rows=int(os.environ.get("EVENTS_BATCH_ROWS", "512")),
+        flush_seconds=float(os.environ.get("EVENTS_FLUSH_SECONDS", "5")),
+    )
+except RuntimeError as e:
+    logger.warning(f"Detection event log disabled: {str(e)}")
+    event_log = None
+
+# Slowest /detect/ requests with their per-stage timings
+slow_requests = SlowRequestLog(capacity=int(os.environ.get("SLOW_REQUEST_CAPACITY", "50")))
+SLOW_REQUEST_LOG_MS = float(os.environ.get("SLOW_REQUEST_LOG_MS", "2000"))
+ENABLE_PROFILER = os.environ.get("ENABLE_PROFILER", "0") == "1"
+profile_lock = asyncio.Lock()
+
+# Named detectors, loaded on first use and evicted LRU under a memory budget.
+# FALLBACK_MODEL is kept as a shorthand for a "fallback" entry.
+FALLBACK_MODEL = os.environ.get("FALLBACK_MODEL")
+MODELS = os.environ.get("MODELS", "primary=best.pt")
+if FALLBACK_MODEL:
+    MODELS += f";fallback={FALLBACK_MODEL}"
+DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "primary")
+registry = ModelRegistry(
+    parse_model_specs(MODELS),
+    memory_budget_bytes=int(float(os.environ.get("MODEL_MEMORY_BUDGET_MB", "0")) * 2**20) or None,
+)
+if DEFAULT_MODEL not in registry:
+    raise ValueError(f"Default model '{DEFAULT_MODEL}' is not in MODELS")
+
+# Inference runs off the event loop; the overload controller picks the
+# input size per request (and, on the last tiers, a smaller model that
+# replaces the requested ones) and sheds load past the queue limit.
+# The pool has a single worker: every request shares one YOLO instance per
+# model, whose predictor serializes calls and reads imgsz/classes from shared
+# state, so a second worker would add no parallelism and could run a request
+# at another request's tier.
+inference_pool = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="inference"
+)
+INFERENCE_TIERS = os.environ.get(
+    "INFERENCE_TIERS", "640,480,320" + (",fallback@320" if FALLBACK_MODEL else "")
+)
+overload = OverloadController(
+    parse_tiers(INFERENCE_TIERS),
+    latency_slo_ms=float(os.environ.get("LATENCY_SLO_MS", "1000")),
+    max_queue=int(os.environ.get("MAX_INFERENCE_QUEUE", "16")),
+    step_down_queue=int(os.environ.get("STEP_DOWN_QUEUE", "2")),
+    cooldown=float(os.environ.get("TIER_COOLDOWN_SECONDS", "5")),
+)
+for _tier in overload.tiers:
+    if _tier.model != "primary" and _tier.model not in registry:
+        raise ValueError(f"Inference tier {_tier.name} has no model configured")
+
+# Per-stream object tracking, enabled by sending a stream_id with /detect/
+TRACK_HIGH_THRESH = float(os.environ.get("TRACK_HIGH_THRESH", "0.5"))
+TRACK_MATCH_THRESH = float(os.environ.get("TRACK_MATCH_THRESH", "0.3"))
+TRACK_MAX_AGE = int(os.environ.get("TRACK_MAX_AGE", "30"))
+TRACK_MIN_HITS = int(os.environ.get("TRACK_MIN_HITS", "1"))
+trackers = TrackerRegistry(
+    max_streams=int(os.environ.get("TRACKER_MAX_STREAMS", "10000")),
+    idle_ttl=float(os.environ.get("TRACKER_IDLE_TTL", "600")),
+)
+if WEB_CONCURRENCY > 1:
+    logger.warning(
+        "Stream tracking keeps state per worker; with WEB_CONCURRENCY > 1 route "
+        "each stream_id to a single worker or tracks are counted once per worker"
+    )
 
 def load_model():
-    """Load the YOLO model with memory optimization."""
-    global model
+    """Load the default YOLO model so the first request does not pay for it."""
     try:
         logger.info("Loading YOLO model...")
-        model_path = "best.pt"
-        if not os.path.exists(model_path):
-            logger.error(f"Model file not found at {model_path}")
-            raise FileNotFoundError(f"Model file not found at {model_path}")
-        
-        # Clear any existing model from memory
-        if model is not None:
-            del model
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
-        
-        # Load model in inference mode
-        model = YOLO(model_path, task='detect')
-        model.fuse()  # Fuse model layers for inference
-        
-        # Force model to CPU and eval mode
-        model.to('cpu')
-        for m in model.modules():
-            if hasattr(m, 'eval'):
-                m.eval()
-        
+        with registry.acquire(DEFAULT_MODEL):
+            pass
         logger.info("YOLO model loaded successfully")
     except Exception as e:
         logger.error(f"Error loading YOLO model: {str(e)}")
         raise
 
+def run_inference(image, tier, model_names):
+    """Run each named model on one decoded image; called on the inference pool.
+
+    The image is decoded once and shared by every model. Returns
+    ``{name: (results, latency_ms)}`` in request order.
+    """
+    outputs = {}
+    for name in model_names:
+        with registry.acquire(name) as detector:
+            inference_start = time.perf_counter()
+            results = detector(image, imgsz=tier.imgsz, classes=registry.specs[name].classes)
+            outputs[name] = (results, (time.perf_counter() - inference_start) * 1000)
+
+    # Clear some memory
+    torch.cuda.empty_cache() if torch.cuda.is_available() else None
+    gc.collect()
+    return outputs
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize the model when the app starts."""
     load_model()
+    if THREAD_AUTOTUNE and "TORCH_THREADS" not in os.environ:
+        imgsz = overload.tiers[0].imgsz
+        with registry.acquire(DEFAULT_MODEL) as detector:
+            autotune(
+                lambda image: detector(image, imgsz=imgsz, verbose=False),
+                candidate_thread_counts(THREAD_BUDGET),
+                imgsz=imgsz,
+            )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush and close the open event log segment."""
+    if event_log is not None:
+        event_log.close()
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "model_loaded": model is not None}
+    return {
+        "status": "healthy",
+        "model_loaded": DEFAULT_MODEL in registry.loaded(),
+        "models": {
+            "available": list(registry.specs),
+            "loaded": list(registry.loaded()),
+            "resident_mb": round(registry.resident_bytes() / 2**20, 1)
+        },
+        "tracked_streams": len(trackers),
+        "torch_threads": torch.get_num_threads(),
+        "inference": overload.snapshot()
+    }
+
+@app.delete("/streams/{stream_id}")
+async def reset_stream(stream_id: str):
+    """Forget the tracker state of a stream."""
+    return {"stream_id": stream_id, "reset": trackers.drop(stream_id)}
+
+def read_counters():
+    """Current detection and false alarm totals from the stats file."""
+    with open(STATS_FILE, "r") as f:
+        stats = json.load(f)
+    return {
+        "total_detections": stats["total_detections"],
+        "total_false_alarms": stats["total_false_alarms"]
+    }
 
 @app.get("/stats")
 async def get_stats():
+    """Detection and false alarm totals; events are paged through /history."""
     try:
-        with open(STATS_FILE, "r") as f:
-            stats = json.load(f)
-        return stats
+        return read_counters()
     except Exception as e:
         logger.error(f"Error reading stats: {str(e)}")
         return JSONResponse(content={"error": str(e)}, status_code=500)
 
-@app.get("/", response_class=HTMLResponse)
-async def home():
-    return """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Teddy Bear Detection</title>
-        <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-        <style>
-            :root {
-                --primary-blue: #1a73e8;
-                --light-blue: #e8f0fe;
-                --hover-blue: #1557b0;
-                --border-blue: #4285f4;
-            }
-            
-            body {
-                font-family: 'Segoe UI', Arial, sans-serif;
-                max-width: 900px;
-                margin: 0 auto;
-                padding: 30px;
-                background-color: #f8f9fa;
-            }
-            
-            .container {
-                background-color: white;
-                padding: 30px;
-                border-radius: 12px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                border: 1px solid #e1e4e8;
-                position: relative;
-            }
-            
-            .stats-button {
-                position: absolute;
-                top: 20px;
-                right: 20px;
-                background-color: var(--primary-blue);
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 20px;
-                cursor: pointer;
-                display: flex;
-                align-items: center;
-                gap: 8px;
-                transition: background-color 0.3s;
-            }
-            
-            .stats-button:hover {
-                background-color: var(--hover-blue);
-            }
-            
-            .modal {
-                display: none;
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                background-color: rgba(0, 0, 0, 0.5);
-                z-index: 1000;
-            }
-            
-            .modal-content {
-                background-color: white;
-                margin: 0;
-                padding: 30px;
-                width: 100%;
-                height: 100%;
-                position: relative;
-                overflow-y: auto;
-                box-sizing: border-box;
-            }
-            
-            .close-button {
-                position: fixed;
-                top: 20px;
-                right: 30px;
-                font-size: 24px;
-                cursor: pointer;
-                color: #666;
-                z-index: 1010;
-                background-color: white;
-                width: 40px;
-                height: 40px;
-                border-radius: 50%;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            }
-
-            .close-button:hover {
-                background-color: #f0f0f0;
-            }
-            
-            .stats-container {
-                max-width: 1200px;
-                margin: 0 auto;
-                padding: 20px;
-            }
-            
-            .stats-grid {
-                display: grid;
-                grid-template-columns: repeat(2, 1fr);
-                gap: 20px;
-                margin: 20px 0;
-            }
-            
-            .chart-container {
-                margin: 30px 0;
-                padding: 20px;
-                background-color: white;
-                border-radius: 8px;
-                border: 1px solid #e1e4e8;
-                height: 400px;
-            }
-            
-            .detection-list {
-                max-height: 300px;
-                overflow-y: auto;
-                border: 1px solid #e1e4e8;
-                border-radius: 8px;
-                background-color: white;
-            }
-
-            .stats-header {
-                margin-bottom: 30px;
-                text-align: center;
-            }
-
-            .stats-section {
-                margin-bottom: 40px;
-            }
-            
-            .stat-card {
-                background-color: var(--light-blue);
-                padding: 20px;
-                border-radius: 8px;
-                text-align: center;
-            }
-            
-            .stat-number {
-                font-size: 2em;
-                color: var(--primary-blue);
-                font-weight: bold;
-            }
-            
-            .detection-item {
-                padding: 10px;
-                border-bottom: 1px solid #e1e4e8;
-                display: flex;
-                justify-content: space-between;
-            }
-            
-            .detection-item:last-child {
-                border-bottom: none;
-            }
-            
-            #dropZone {
-                border: 2px dashed var(--border-blue);
-                border-radius: 8px;
-                padding: 40px 20px;
-                text-align: center;
-                margin: 20px 0;
-                cursor: pointer;
-                background-color: var(--light-blue);
-                transition: all 0.3s ease;
-                color: var(--primary-blue);
-                font-size: 1.1em;
-            }
-            
-            #dropZone:hover {
-                background-color: #f0f7ff;
-                border-color: var(--primary-blue);
-            }
-            
-            #dropZone.dragover {
-                background-color: #f0f7ff;
-                border-color: var(--primary-blue);
-                transform: scale(1.02);
-            }
-            
-            #resultImage {
-                max-width: 100%;
-                margin-top: 20px;
-                border-radius: 8px;
-                box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-            }
-            
-            .loading {
-                display: none;
-                text-align: center;
-                margin: 20px 0;
-                color: var(--primary-blue);
-                font-weight: 500;
-            }
-            
-            .loading::after {
-                content: '';
-                display: inline-block;
-                width: 20px;
-                height: 20px;
-                margin-left: 10px;
-                border: 3px solid var(--light-blue);
-                border-top: 3px solid var(--primary-blue);
-                border-radius: 50%;
-                animation: spin 1s linear infinite;
-            }
-            
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-            
-            #error {
-                color: #d93025;
-                display: none;
-                margin: 15px 0;
-                text-align: center;
-                padding: 12px;
-                background-color: #fce8e6;
-                border-radius: 8px;
-                border: 1px solid #fad2cf;
-            }
-            
-            #message {
-                color: #6c757d;
-                display: none;
-                margin: 15px 0;
-                text-align: center;
-                padding: 12px;
-                background-color: #f8f9fa;
-                border-radius: 8px;
-                border: 1px solid #dee2e6;
-                font-weight: 500;
-                font-size: 1.2em;
-                animation: bounceIn 0.5s ease-out;
-            }
-            
-            @keyframes bounceIn {
-                0% {
-                    transform: scale(0.3);
-                    opacity: 0;
-                }
-                50% {
-                    transform: scale(1.05);
-                    opacity: 0.8;
-                }
-                100% {
-                    transform: scale(1);
-                    opacity: 1;
-                }
-            }
-            
-            .result-container {
-                position: relative;
-            }
-
-            /* Alert styles */
-            .alert {
-                display: none;
-                background-color: #ff4444;
-                color: white;
-                padding: 15px 20px;
-                border-radius: 8px;
-                margin: 20px 0;
-                text-align: center;
-                font-weight: bold;
-                font-size: 1.2em;
-                position: relative;
-                animation: alertPulse 2s infinite;
-                box-shadow: 0 4px 12px rgba(255, 68, 68, 0.2);
-            }
-
-            @keyframes alertPulse {
-                0% { background-color: #ff4444; }
-                50% { background-color: #cc0000; }
-                100% { background-color: #ff4444; }
-            }
-
-            .alert-icon {
-                display: inline-block;
-                margin-right: 10px;
-                animation: alertBlink 1s infinite;
-            }
-
-            @keyframes alertBlink {
-                0% { opacity: 1; }
-                50% { opacity: 0.5; }
-                100% { opacity: 1; }
-            }
-
-            .detection-overlay {
-                display: none;
-            }
-
-            .history-stats {
-                position: fixed;
-                bottom: 20px;
-                right: 20px;
-                background-color: rgba(255, 255, 255, 0.95);
-                padding: 15px 20px;
-                border-radius: 12px;
-                box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1);
-                border: 1px solid #e1e4e8;
-                font-size: 0.9em;
-                color: #666;
-                max-width: 300px;
-                backdrop-filter: blur(5px);
-                transition: opacity 0.3s;
-                z-index: 100;
-            }
-            
-            .history-stats:hover {
-                opacity: 1;
-            }
-            
-            .history-stats.with-detection {
-                border-left: 4px solid var(--primary-blue);
-            }
-            
-            .history-stats.with-false-alarm {
-                border-left: 4px solid #ff9800;
-            }
-            
-            .history-icon {
-                margin-right: 8px;
-                font-size: 1.1em;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>Teddy Bear Detection</h1>
-            <button class="stats-button" onclick="openStats()">
-                <svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                    <path d="M23 6l-9.5 9.5-5-5L1 18"/>
-                    <path d="M17 6h6v6"/>
-                </svg>
-                Statistics
-            </button>
-            <div id="dropZone">
-                <svg xmlns="http://www.w3.org/2000/svg" width="48" height="48" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-                    <path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/>
-                    <polyline points="17 8 12 3 7 8"/>
-                    <line x1="12" y1="3" x2="12" y2="15"/>
-                </svg>
-                <p style="margin: 10px 0 0 0;">Drop an image here or click to upload</p>
-                <input type="file" id="fileInput" style="display: none;" accept="image/*">
-            </div>
-            <div class="loading" id="loading">Processing your image</div>
-            <div id="error"></div>
-            <div id="message"></div>
-            <div class="alert" id="alert">
-                <span class="alert-icon">⚠️</span>
-                <span id="alertText"></span>
-            </div>
-            <div class="result-container">
-                <img id="resultImage" style="display: none;">
-            </div>
-        </div>
-
-        <!-- Statistics Modal -->
-        <div id="statsModal" class="modal">
-            <div class="modal-content">
-                <span class="close-button" onclick="closeStats()">&times;</span>
-                <div class="stats-container">
-                    <div class="stats-header">
-                        <h1>Surveillance Statistics</h1>
-                    </div>
-                    
-                    <div class="stats-section">
-                        <div class="stats-grid">
-                            <div class="stat-card">
-                                <div class="stat-number" id="totalDetections">0</div>
-                                <div>Teddy Bears Detected</div>
-                            </div>
-                            <div class="stat-card">
-                                <div class="stat-number" id="totalFalseAlarms">0</div>
-                                <div>False Alarms</div>
-                            </div>
-                        </div>
-                    </div>
-
-                    <div class="stats-section">
-                        <h2>Detection History</h2>
-                        <div class="chart-container">
-                            <canvas id="detectionChart"></canvas>
-                        </div>
-                    </div>
-
-                    <div class="stats-section">
-                        <h2>Recent Detections</h2>
-                        <div class="detection-list" id="detectionList"></div>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <div id="historyStats" class="history-stats" style="display: none;">
-            <span class="history-icon">📊</span>
-            <span id="historyText"></span>
-        </div>
-
-        <script>
-            const dropZone = document.getElementById('dropZone');
-            const fileInput = document.getElementById('fileInput');
-            const loading = document.getElementById('loading');
-            const resultImage = document.getElementById('resultImage');
-            const errorDiv = document.getElementById('error');
-            const messageDiv = document.getElementById('message');
-            const alert = document.getElementById('alert');
-            const alertText = document.getElementById('alertText');
-
-            dropZone.addEventListener('click', () => fileInput.click());
-            
-            dropZone.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                dropZone.classList.add('dragover');
-            });
-            
-            dropZone.addEventListener('dragleave', () => {
-                dropZone.classList.remove('dragover');
-            });
-            
-            dropZone.addEventListener('drop', (e) => {
-                e.preventDefault();
-                dropZone.classList.remove('dragover');
-                const file = e.dataTransfer.files[0];
-                if (file) processFile(file);
-            });
-            
-            fileInput.addEventListener('change', (e) => {
-                const file = e.target.files[0];
-                if (file) processFile(file);
-            });
-
-            async function processFile(file) {
-                loading.style.display = 'block';
-                resultImage.style.display = 'none';
-                errorDiv.style.display = 'none';
-                messageDiv.style.display = 'none';
-                alert.style.display = 'none';
-                
-                const formData = new FormData();
-                formData.append('file', file);
-                
-                try {
-                    const response = await fetch('/detect/', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    
-                    if (response.ok) {
-                        const data = await response.json();
-                        if (data.error) {
-                            errorDiv.textContent = 'Error: ' + data.error;
-                            errorDiv.style.display = 'block';
-                        } else {
-                            resultImage.src = 'data:image/jpeg;base64,' + data.image;
-                            resultImage.style.display = 'block';
-                            
-                            if (data.teddy_detected) {
-                                const count = data.teddy_count;
-                                alert.style.display = 'block';
-                                alertText.textContent = `ALERT: ${count} Teddy Bear${count > 1 ? 's' : ''} Detected!`;
-                                updateHistoryStats(true);
-                            } else if (data.message) {
-                                messageDiv.textContent = data.message;
-                                messageDiv.style.display = 'block';
-                                updateHistoryStats(false);
-                            }
-                        }
-                    } else {
-                        const error = await response.json();
-                        errorDiv.textContent = 'Error: ' + (error.detail || 'Failed to process image');
-                        errorDiv.style.display = 'block';
-                    }
-                } catch (error) {
-                    errorDiv.textContent = 'Error: ' + error.message;
-                    errorDiv.style.display = 'block';
-                } finally {
-                    loading.style.display = 'none';
-                }
-            }
-
-            let detectionChart = null;
-
-            function processDetectionData(stats) {
-                // Process data by day
-                const detectionsByDay = {};
-                const falseAlarmsByDay = {};
-                
-                stats.detections.forEach(detection => {
-                    const date = new Date(detection.timestamp).toLocaleDateString();
-                    if (!detectionsByDay[date]) {
-                        detectionsByDay[date] = 0;
-                        falseAlarmsByDay[date] = 0;
-                    }
-                    
-                    if (detection.result.includes("No teddy bears detected")) {
-                        falseAlarmsByDay[date]++;
-                    } else {
-                        // Extract number of detections from the result string
-                        const match = detection.result.match(/Detected (\d+) teddy/);
-                        if (match) {
-                            detectionsByDay[date] += parseInt(match[1]);
-                        }
-                    }
-                });
-                
-                // Sort dates
-                const dates = Object.keys(detectionsByDay).sort();
-                
-                return {
-                    labels: dates,
-                    detections: dates.map(date => detectionsByDay[date]),
-                    falseAlarms: dates.map(date => falseAlarmsByDay[date])
-                };
-            }
-
-            function updateChart(stats) {
-                const chartData = processDetectionData(stats);
-                
-                if (detectionChart) {
-                    detectionChart.destroy();
-                }
-                
-                const ctx = document.getElementById('detectionChart').getContext('2d');
-                detectionChart = new Chart(ctx, {
-                    type: 'bar',
-                    data: {
-                        labels: chartData.labels,
-                        datasets: [
-                            {
-                                label: 'Teddy Bears Detected',
-                                data: chartData.detections,
-                                backgroundColor: 'rgba(26, 115, 232, 0.5)',
-                                borderColor: 'rgba(26, 115, 232, 1)',
-                                borderWidth: 1
-                            },
-                            {
-                                label: 'False Alarms',
-                                data: chartData.falseAlarms,
-                                backgroundColor: 'rgba(255, 152, 0, 0.5)',
-                                borderColor: 'rgba(255, 152, 0, 1)',
-                                borderWidth: 1
-                            }
-                        ]
-                    },
-                    options: {
-                        responsive: true,
-                        maintainAspectRatio: true,
-                        scales: {
-                            y: {
-                                beginAtZero: true,
-                                ticks: {
-                                    stepSize: 1
-                                },
-                                title: {
-                                    display: true,
-                                    text: 'Number of Events'
-                                }
-                            },
-                            x: {
-                                title: {
-                                    display: true,
-                                    text: 'Date'
-                                }
-                            }
-                        },
-                        plugins: {
-                            legend: {
-                                position: 'top'
-                            }
-                        }
-                    }
-                });
-            }
-            
-            async function openStats() {
-                try {
-                    const response = await fetch('/stats');
-                    const stats = await response.json();
-                    
-                    document.getElementById('totalDetections').textContent = stats.total_detections;
-                    document.getElementById('totalFalseAlarms').textContent = stats.total_false_alarms;
-                    
-                    // Update chart
-                    updateChart(stats);
-                    
-                    const detectionList = document.getElementById('detectionList');
-                    detectionList.innerHTML = '';
-                    
-                    stats.detections.slice().reverse().forEach(detection => {
-                        const item = document.createElement('div');
-                        item.className = 'detection-item';
-                        item.innerHTML = `
-                            <span>${detection.result}</span>
-                            <span>${new Date(detection.timestamp).toLocaleString()}</span>
-                        `;
-                        detectionList.appendChild(item);
-                    });
-                    
-                    document.getElementById('statsModal').style.display = 'block';
-                } catch (error) {
-                    console.error('Error fetching stats:', error);
-                }
-            }
-            
-            function closeStats() {
-                document.getElementById('statsModal').style.display = 'none';
-            }
-            
-            // Close modal when clicking outside
-            window.onclick = function(event) {
-                const modal = document.getElementById('statsModal');
-                if (event.target == modal) {
-                    modal.style.display = 'none';
-                }
-            }
+@app.get("/stats/stream")
+async def stream_stats(request: Request):
+    """Server-Sent Events feed of the counters, pushed after every recorded event."""
+    return StreamingResponse(
+        stats_feed.stream(read_counters, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def parse_time_range(start, end):
+    """Parse optional ISO 8601 ``start``/``end`` query parameters."""
+    return (
+        datetime.fromisoformat(start) if start else None,
+        datetime.fromisoformat(end) if end else None,
+    )
+
+# Plain def: Starlette runs these in its threadpool, so SQLite never blocks the event loop
+@app.get("/history")
+def get_history(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    kind: Optional[str] = None,
+    stream_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+):
+    """Page through detection events, newest first."""
+    try:
+        start_time, end_time = parse_time_range(start, end)
+        if kind is not None and kind not in (DETECTION, FALSE_ALARM):
+            raise ValueError(f"kind must be '{DETECTION}' or '{FALSE_ALARM}'")
+        events, next_cursor = history.query(
+            start=start_time, end=end_time, kind=kind, stream_id=stream_id,
+            limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return {"events": events, "next_cursor": next_cursor}
+
+@app.get("/history/aggregate")
+def get_history_aggregate(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    stream_id: Optional[str] = None,
+    bucket: str = "day",
+):
+    """Detections and false alarms per hour, day or month."""
+    try:
+        start_time, end_time = parse_time_range(start, end)
+        if bucket not in BUCKET_FORMATS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKET_FORMATS)}")
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return history.aggregate(start=start_time, end=end_time, stream_id=stream_id, bucket=bucket)
+
+@app.get("/events/export")
+async def export_events(start: Optional[str] = None, end: Optional[str] = None):
+    """Bulk export of detection events as one Arrow IPC stream."""
+    if event_log is None:
+        return JSONResponse(content={"error": "Detection event log is disabled"}, status_code=503)
+    try:
+        start_time, end_time = parse_time_range(start, end)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return StreamingResponse(
+        event_log.export(start=start_time, end=end_time),
+        media_type="application/vnd.apache.arrow.stream",
+        headers={"Content-Disposition": 'attachment; filename="detections.arrows"'}
+    )
+
+@app.get("/debug/slow-requests")
+async def get_slow_requests(limit: int = Query(50, ge=1, le=1000)):
+    """The slowest /detect/ requests with image sizes and stage timings."""
+    return {"requests": slow_requests.slowest(limit)}
+
+@app.delete("/debug/slow-requests")
+async def clear_slow_requests():
+    slow_requests.clear()
+    return {"cleared": True}
+
+@app.post("/debug/profile")
+async def profile(seconds: float = Query(10.0, gt=0, le=60), interval_ms: float = Query(5.0, ge=1, le=100)):
+    """Sample all thread stacks for a while and return the hottest ones."""
+    if not ENABLE_PROFILER:
+        return JSONResponse(content={"error": "Profiler is disabled, set ENABLE_PROFILER=1"}, status_code=403)
+    if profile_lock.locked():
+        return JSONResponse(content={"error": "A profile is already running"}, status_code=409)
+    async with profile_lock:
+        logger.info(f"Sampling stacks for {seconds}s")
+        return await asyncio.get_running_loop().run_in_executor(
+            None, sample_stacks, seconds, interval_ms / 1000
+        )
 
-            async function updateHistoryStats(teddy_detected) {
-                const response = await fetch('/stats');
-                const stats = await response.json();
-                
-                const historyStats = document.getElementById('historyStats');
-                const historyText = document.getElementById('historyText');
-                
-                if (teddy_detected) {
-                    historyStats.className = 'history-stats with-detection';
-                    historyText.textContent = `⚠️ Security Alert: ${stats.total_detections} teddy bear intrusions recorded in the surveillance period`;
-                } else {
-                    historyStats.className = 'history-stats with-false-alarm';
-                    historyText.textContent = `System Status: ${stats.total_false_alarms} false alarms during surveillance period`;
-                }
-                
-                historyStats.style.display = 'block';
-            }
-        </script>
-    </body>
-    </html>
-    """
+@app.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    return frontend.page_response(request)
 
-def count_recent_detections(stats, is_detection=True, days=5):
+def count_recent_detections(is_detection=True, days=5):
     """Count detections or false alarms in the last specified number of days."""
-    current_time = datetime.now()
-    cutoff_time = current_time - timedelta(days=days)
-    
-    count = 0
-    for detection in stats["detections"]:
-        try:
-            detection_time = datetime.fromisoformat(detection["timestamp"])
-            if detection_time >= cutoff_time:
-                # Specifically check for the detection format
-                is_false_alarm = detection["result"].startswith("No teddy bears detected")
-                if (not is_detection and is_false_alarm) or (is_detection and not is_false_alarm):
-                    count += 1
-        except (ValueError, KeyError):
-            continue
-    
-    return count
-
-def calculate_date_range(stats):
+    cutoff_time = datetime.now() - timedelta(days=days)
+    return history.count(DETECTION if is_detection else FALSE_ALARM, start=cutoff_time)
+
+def calculate_date_range():
     """Calculate the date range of detections and return days span."""
-    if not stats["detections"]:
+    earliest, latest = history.span()
+    if earliest is None:
         return 0
-    
-    dates = [datetime.fromisoformat(d["timestamp"]) for d in stats["detections"]]
-    earliest = min(dates)
-    latest = max(dates)
-    days_span = (latest - earliest).days + 1  # +1 to include both start and end days
-    return days_span
+    return (latest - earliest).days + 1  # +1 to include both start and end days
+
+def traced_error(trace, message, status_code, headers=None):
+    """Error response carrying the trace id in its body and X-Trace-Id header."""
+    return JSONResponse(
+        content={"error": message, "trace_id": trace.trace_id},
+        status_code=status_code,
+        headers={"X-Trace-Id": trace.trace_id, **(headers or {})}
+    )
+
+def detections_summary(result, latency_ms):
+    """Boxes, scores and class names of one model's result for the response."""
+    xyxy, scores, classes = box_arrays(result)
+    return {
+        "count": len(scores),
+        "boxes": [[round(float(v), 1) for v in box] for box in xyxy],
+        "scores": [round(float(score), 4) for score in scores],
+        "classes": [result.names[int(c)] for c in classes],
+        "latency_ms": round(latency_ms, 1)
+    }
 
 @app.post("/detect/")
-async def detect(file: UploadFile = File(...)):
+async def detect(
+    request: Request,
+    http_response: Response,
+    file: UploadFile = File(...),
+    stream_id: Optional[str] = Form(None),
+    models: Optional[str] = Form(None)
+):
+    trace = Trace(request.headers.get("x-request-id"), filename=file.filename, stream_id=stream_id)
+    http_response.headers["X-Trace-Id"] = trace.trace_id
     try:
-        logger.info(f"Processing uploaded file: {file.filename}")
+        logger.info(f"Processing uploaded file: {file.filename} (stream: {stream_id})")
         
-        # Check if model is loaded
-        if model is None:
-            logger.error("Model not loaded")
-            return JSONResponse(
-                content={"error": "Model not initialized properly"},
-                status_code=503
-            )
+        # Resolve the requested detectors; the first one drives alerts and stats
+        model_names = [name.strip() for name in (models or DEFAULT_MODEL).split(",") if name.strip()]
+        model_names = list(dict.fromkeys(model_names)) or [DEFAULT_MODEL]
+        unknown = [name for name in model_names if name not in registry]
+        if unknown:
+            logger.error(f"Unknown models requested: {unknown}")
+            return traced_error(trace, f"Unknown model(s): {', '.join(unknown)}", 400)
         
         # Read the image file
-        contents = await file.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        with trace.span("read"):
+            contents = await file.read()
+        trace.attrs["image_bytes"] = len(contents)
+        with trace.span("decode"):
+            nparr = np.frombuffer(contents, np.uint8)
+            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if image is None:
             logger.error("Failed to decode image")
-            return JSONResponse(
-                content={"error": "Failed to decode image"},
-                status_code=400
+            return traced_error(trace, "Failed to decode image", 400)
+        
+        trace.attrs["width"], trace.attrs["height"] = image.shape[1], image.shape[0]
+        
+        # Admit the request at the current tier, or shed it when the queue is full
+        tier = overload.admit()
+        trace.attrs["tier"] = tier.name if tier is not None else None
+        if tier is None:
+            logger.warning("Inference queue full, shedding request")
+            return traced_error(
+                trace, "Server is overloaded, please retry shortly", 503, headers={"Retry-After": "1"}
             )
         
+        # Degraded tiers swap the requested models for a single smaller one
+        served_models = model_names if tier.model == "primary" else [tier.model]
+        trace.attrs["models"] = served_models
+        
+        queued_at = time.perf_counter()
         try:
-            logger.info("Running YOLOv8 inference...")
-            # Run YOLOv8 inference
-            results = model(image)
+            logger.info(f"Running YOLOv8 inference with {', '.join(served_models)} at tier {tier.name}...")
+            # Run YOLOv8 inference; the decoded image is shared by all models
+            outputs = await run_in_executor(inference_pool, run_inference, image, tier, served_models)
+            results, latency_ms = outputs[served_models[0]]
             logger.info("Inference complete")
             
-            # Clear some memory
-            torch.cuda.empty_cache() if torch.cuda.is_available() else None
-            gc.collect()
-            
         except Exception as e:
             logger.error(f"Error during inference: {str(e)}")
-            return JSONResponse(
-                content={"error": f"Error during inference: {str(e)}"},
-                status_code=500
-            )
+            return traced_error(trace, f"Error during inference: {str(e)}", 500)
+        finally:
+            queued_ms = (time.perf_counter() - queued_at) * 1000
+            overload.release(queued_ms)
+        trace.add_span("queue", queued_ms - sum(ms for _, ms in outputs.values()))
+        for name, (_, ms) in outputs.items():
+            trace.add_span(f"inference:{name}", ms)
         
         # Update statistics
+        postprocess_start = time.perf_counter()
         with open(STATS_FILE, "r") as f:
             stats = json.load(f)
         
-        detection_time = datetime.now().isoformat()
+        detection_datetime = datetime.now()
+        detection_time = detection_datetime.isoformat()
         teddy_count = len(results[0].boxes)
-        
+        new_event = None
+
+        track_ids = None
+        new_tracks = []
+        xyxy, scores, classes = box_arrays(results[0])
+        if stream_id:
+            track_ids, new_tracks = trackers.get(stream_id).update(
+                xyxy,
+                scores,
+                high_thresh=TRACK_HIGH_THRESH,
+                match_thresh=TRACK_MATCH_THRESH,
+                max_age=TRACK_MAX_AGE,
+                min_hits=TRACK_MIN_HITS,
+            )
+
         if teddy_count == 0:
             logger.info("No teddy bears detected in the image")
-            stats["total_false_alarms"] += 1
             detection_result = "No teddy bears detected - False alarm, oopsie! 🙈"
-            stats["detections"].append({
-                "result": detection_result,
-                "timestamp": detection_time
-            })
+            # An empty frame on a tracked stream is not a false alarm
+            if not stream_id:
+                stats["total_false_alarms"] += 1
+                new_event = {
+                    "result": detection_result,
+                    "timestamp": detection_time
+                }
+                history.record(FALSE_ALARM, 0, detection_result, timestamp=detection_datetime)
             result_image = image
             message = detection_result
         else:
-            stats["total_detections"] += 1
-            detection_result = f"Detected {teddy_count} teddy bear(s)"
-            stats["detections"].append({
-                "result": detection_result,
-                "timestamp": detection_time
-            })
-            result_image = results[0].plot()
-            border_size = 10
-            result_image = cv2.copyMakeBorder(
-                result_image,
-                border_size, border_size, border_size, border_size,
-                cv2.BORDER_CONSTANT,
-                value=(0, 0, 255)
-            )
+            # Tracked streams count each teddy bear once, not once per frame
+            if stream_id:
+                if new_tracks:
+                    detection_result = f"Detected {len(new_tracks)} teddy bear(s)"
+                    stats["total_detections"] += len(new_tracks)
+                    new_event = {
+                        "result": detection_result,
+                        "timestamp": detection_time,
+                        "stream_id": stream_id,
+                        "track_ids": new_tracks
+                    }
+                    history.record(
+                        DETECTION, len(new_tracks), detection_result,
+                        timestamp=detection_datetime, stream_id=stream_id
+                    )
+            else:
+                detection_result = f"Detected {teddy_count} teddy bear(s)"
+                stats["total_detections"] += 1
+                new_event = {
+                    "result": detection_result,
+                    "timestamp": detection_time
+                }
+                history.record(DETECTION, teddy_count, detection_result, timestamp=detection_datetime)
+            result_image = annotate(results[0])
             message = f"⚠️ {teddy_count} Teddy Bear{'s' if teddy_count > 1 else ''} Detected!"
         
-        # Keep only the last 100 detections
-        stats["detections"] = stats["detections"][-100:]
-        
+        # Persist the full result to the columnar event log
+        if event_log is not None:
+            event_log.append(
+                timestamp=detection_datetime,
+                camera_id=stream_id,
+                image_sha256=hashlib.sha256(contents).digest(),
+                image_bytes=len(contents),
+                width=image.shape[1],
+                height=image.shape[0],
+                latency_ms=latency_ms,
+                boxes=xyxy,
+                scores=scores,
+                classes=classes,
+                track_ids=track_ids,
+            )
+
         # Save updated statistics
         with open(STATS_FILE, "w") as f:
             json.dump(stats, f)
+
+        # Push the new counters to live dashboards without waiting on them
+        if new_event is not None:
+            stats_feed.publish({
+                "total_detections": stats["total_detections"],
+                "total_false_alarms": stats["total_false_alarms"],
+                "event": new_event
+            })
+        
+        trace.add_span("postprocess", (time.perf_counter() - postprocess_start) * 1000)
         
         # Convert the image to base64
-        is_success, buffer = cv2.imencode(".jpg", result_image)
+        with trace.span("encode"):
+            is_success, buffer = cv2.imencode(".jpg", result_image)
         if not is_success:
             logger.error("Failed to encode result image")
-            return JSONResponse(
-                content={"error": "Failed to encode result image"},
-                status_code=500
-            )
+            return traced_error(trace, "Failed to encode result image", 500)
             
         img_str = base64.b64encode(buffer).decode()
+        trace.attrs["response_bytes"] = len(img_str)
         logger.info("Successfully processed image")
         
+        # Per-model detections when models were selected explicitly
+        model_summaries = None
+        if models:
+            model_summaries = {
+                name: detections_summary(model_results[0], ms)
+                for name, (model_results, ms) in outputs.items()
+            }
+        
         # Clear some memory again
-        del results
+        del results, outputs
         gc.collect()
         torch.cuda.empty_cache() if torch.cuda.is_available() else None
         
         # Return appropriate response
         if teddy_count == 0:
-            return {
+            response = {
                 "image": img_str,
                 "message": message,
                 "teddy_detected": False
             }
         else:
-            return {
+            response = {
                 "image": img_str,
                 "teddy_detected": True,
                 "teddy_count": teddy_count,
                 "message": message
             }
+
+        response["tier"] = tier.name
+        response["model"] = served_models[0]
+        if model_summaries is not None:
+            response["models"] = model_summaries
+        response["trace_id"] = trace.trace_id
+        if stream_id:
+            # Only alert on tracks that have not been reported before
+            response["stream_id"] = stream_id
+            response["track_ids"] = track_ids
+            response["new_track_ids"] = new_tracks
+            response["alert"] = bool(new_tracks)
+        return response
         
     except Exception as e:
         logger.error(f"Error processing image: {str(e)}")
-        return JSONResponse(content={"error": str(e)}, status_code=500) 
\ No newline at end of file
+        return traced_error(trace, str(e), 500)
+    finally:
+        total_ms = trace.finish()
+        slow_requests.record(trace)
+        if total_ms > SLOW_REQUEST_LOG_MS:
+            logger.warning(f"Slow request {trace.trace_id}: {trace.to_dict()}") 
\ No newline at end of file
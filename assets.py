@@ -0,0 +1,189 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always produced
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+PAGE_CACHE = "no-cache"
+
+# Template placeholder -> source file, relative to the static directory
+PAGE_ASSETS = {
+    "app_css": "css/app.css",
+    "app_js": "js/app.js",
+    "bar_chart_js": "js/bar-chart.js",
+}
+
+
+def compress(data):
+    """Return the encodings worth serving for ``data``, keyed by encoding name."""
+    encoded = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(data, quality=11)
+    return {name: body for name, body in encoded.items() if len(body) < len(data)}
+
+
+def parse_accept_encoding(header):
+    """Map each coding in an ``Accept-Encoding`` header to its q-value."""
+    qvalues = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding.lower()] = q
+    return qvalues
+
+
+def accepted_encoding(request_headers, available):
+    """Pick the best encoding from ``available`` the client accepts.
+
+    Codings with ``q=0`` are refused; ``*`` covers codings not listed.
+    Between equally weighted codings brotli wins over gzip.
+    """
+    qvalues = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+    best, best_q = None, 0.0
+    for name in ("br", "gzip"):
+        q = qvalues.get(name, qvalues.get("*", 0.0))
+        if name in available and q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class AssetBundle:
+    """Content-hashed, precompressed copies of the frontend assets.
+
+    ``build()`` writes ``<name>.<hash>.<ext>`` files plus ``.gz``/``.br``
+    siblings into ``static/dist`` and renders ``index.html`` against those
+    URLs, so every asset can be cached forever and the page itself is only
+    revalidated through its ETag.
+    """
+
+    def __init__(self, static_dir="static", url_prefix="/static"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.dist_dir = os.path.join(static_dir, "dist")
+        self.urls = {}
+        self.page = {}
+        self.page_etags = {}
+
+    def build(self):
+        os.makedirs(self.dist_dir, exist_ok=True)
+
+        self.urls = {}
+        for key, relative_path in PAGE_ASSETS.items():
+            with open(os.path.join(self.static_dir, relative_path), "rb") as f:
+                data = f.read()
+            self.urls[key] = f"{self.url_prefix}/dist/{self._write_hashed(relative_path, data)}"
+
+        with open(os.path.join(self.static_dir, "index.html"), "r", encoding="utf-8") as f:
+            html = f.read()
+        for key, url in self.urls.items():
+            html = html.replace("{{ %s }}" % key, url)
+
+        body = html.encode("utf-8")
+        self.page = {None: body, **compress(body)}
+        # Each content-coding is a different representation and needs its own strong tag
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        self.page_etags = {
+            encoding: '"%s"' % (digest if encoding is None else f"{digest}-{encoding}")
+            for encoding in self.page
+        }
+        logger.info(f"Built {len(self.urls)} frontend assets into {self.dist_dir}")
+
+    def page_response(self, request: Request):
+        """Serve the rendered page, answering 304 when the ETag still matches.
+
+        Any of the page's tags validates, so a cache holding one encoding
+        can revalidate it; the 304 carries the tag of the variant it matched.
+        """
+        headers = {
+            "Cache-Control": PAGE_CACHE,
+            "Vary": "Accept-Encoding",
+        }
+        if_none_match = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+        for etag in self.page_etags.values():
+            if etag in if_none_match:
+                headers["ETag"] = etag
+                return Response(status_code=304, headers=headers)
+
+        encoding = accepted_encoding(request.headers, self.page)
+        headers["ETag"] = self.page_etags[encoding]
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.page[encoding], media_type="text/html", headers=headers)
+
+    def _write_hashed(self, relative_path, data):
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(os.path.basename(relative_path))
+        name = f"{stem}.{digest}{ext}"
+
+        path = os.path.join(self.dist_dir, name)
+        _write_atomic(path, data)
+        for encoding, body in compress(data).items():
+            _write_atomic(path + (".br" if encoding == "br" else ".gz"), body)
+        return name
+
+
+def _write_atomic(path, data):
+    # Several workers may build at once, so never expose a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``.br``/``.gz`` siblings when the client accepts them.
+
+    Files under ``dist/`` are content-hashed and get a one year immutable
+    Cache-Control; ETag and 304 handling come from Starlette.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        headers = {"Vary": "Accept-Encoding"}
+
+        siblings = {"br": f"{full_path}.br", "gzip": f"{full_path}.gz"}
+        available = [name for name, path in siblings.items() if os.path.exists(path)]
+        encoding = accepted_encoding(request_headers, available)
+        if encoding:
+            full_path = siblings[encoding]
+            stat_result = os.stat(full_path)
+            headers["Content-Encoding"] = encoding
+
+        if f"{os.sep}dist{os.sep}" in str(full_path):
+            headers["Cache-Control"] = IMMUTABLE_CACHE
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,232 @@
+"""Offline teddy bear detection over a directory or glob of images.
+
+Decoding, inference and encoding run as a pipeline: a pool of decode
+workers reads images ahead, the model runs on batches of decoded images,
+and a pool of encode workers draws and writes annotated copies while the
+next batch is inferred. Processed paths are appended to a checkpoint file
+so an interrupted run resumes where it stopped.
+
+    python batch_detect.py photos/ --out results.jsonl --annotated annotated/
+"""
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+
+from detector import build_model, annotate, box_arrays
+from runtime import cpu_budget, configure_threads
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("batch_detect")
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+CSV_FIELDS = ["path", "width", "height", "teddy_count", "max_score", "boxes", "scores", "error"]
+
+
+def find_images(sources, recursive=True):
+    """Expand directories and glob patterns into a sorted list of image paths."""
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(source, recursive=True)
+        paths.update(
+            os.path.abspath(path) for path in candidates
+            if os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS and os.path.isfile(path)
+        )
+    return sorted(paths)
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def decode(path):
+    return path, cv2.imread(path, cv2.IMREAD_COLOR)
+
+
+def decoded_batches(paths, pool, batch_size, prefetch):
+    """Yield lists of ``(path, image)``, keeping ``prefetch`` decodes in flight."""
+    pending = deque()
+    batch = []
+    path_iter = iter(paths)
+
+    for path in path_iter:
+        pending.append(pool.submit(decode, path))
+        if len(pending) >= prefetch:
+            break
+
+    while pending:
+        batch.append(pending.popleft().result())
+        next_path = next(path_iter, None)
+        if next_path is not None:
+            pending.append(pool.submit(decode, next_path))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def finish(path, image, result, annotated_dir, root):
+    """Build the output record and write the annotated image; runs on the encode pool."""
+    xyxy, scores, classes = box_arrays(result)
+    record = {
+        "path": path,
+        "width": image.shape[1],
+        "height": image.shape[0],
+        "teddy_count": len(scores),
+        "boxes": [[round(float(v), 1) for v in box] for box in xyxy],
+        "scores": [round(float(s), 4) for s in scores],
+        "classes": [int(c) for c in classes],
+    }
+    if annotated_dir and len(scores):
+        out_path = os.path.join(annotated_dir, os.path.relpath(path, root))
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        cv2.imwrite(out_path, annotate(result))
+        record["annotated"] = out_path
+    return record
+
+
+class OutputWriter:
+    """Appends records to JSONL and/or CSV, and completed paths to the checkpoint."""
+
+    def __init__(self, jsonl_path, csv_path, checkpoint_path):
+        self.jsonl = open(jsonl_path, "a") if jsonl_path else None
+        self.csv_file = None
+        self.csv = None
+        if csv_path:
+            new_file = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+            self.csv_file = open(csv_path, "a", newline="")
+            self.csv = csv.DictWriter(self.csv_file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new_file:
+                self.csv.writeheader()
+        self.checkpoint = open(checkpoint_path, "a") if checkpoint_path else None
+
+    def write(self, record):
+        if self.jsonl:
+            self.jsonl.write(json.dumps(record) + "\n")
+        if self.csv:
+            row = dict(record)
+            row["max_score"] = max(record.get("scores") or [0.0])
+            row["boxes"] = json.dumps(record.get("boxes", []))
+            row["scores"] = json.dumps(record.get("scores", []))
+            self.csv.writerow(row)
+        if self.checkpoint:
+            self.checkpoint.write(record["path"] + "\n")
+
+    def flush(self):
+        # Outputs first, so a checkpointed path always has its record on disk
+        for f in (self.jsonl, self.csv_file, self.checkpoint):
+            if f:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self):
+        self.flush()
+        for f in (self.jsonl, self.csv_file, self.checkpoint):
+            if f:
+                f.close()
+
+
+def run(args):
+    paths = find_images(args.sources, recursive=not args.no_recursive)
+    done = load_checkpoint(args.checkpoint)
+    todo = [path for path in paths if path not in done]
+    logger.info(f"Found {len(paths)} images, {len(paths) - len(todo)} already processed")
+    if not todo:
+        return
+
+    # From every discovered path, so resumed runs keep the same output layout
+    root = os.path.commonpath(paths) if len(paths) > 1 else os.path.dirname(paths[0])
+    if os.path.isfile(root):
+        root = os.path.dirname(root)
+
+    configure_threads(args.torch_threads or cpu_budget(), interop=1, cv2_threads=1)
+    logger.info(f"Loading YOLO model from {args.model}...")
+    model = build_model(args.model)
+
+    writer = OutputWriter(args.out, args.csv, args.checkpoint)
+    in_flight = deque()
+    processed = 0
+    batches = 0
+    started = time.perf_counter()
+
+    def drain(limit):
+        nonlocal processed
+        while len(in_flight) > limit:
+            writer.write(in_flight.popleft().result())
+            processed += 1
+
+    with ThreadPoolExecutor(args.decode_workers, thread_name_prefix="decode") as decode_pool, \
+            ThreadPoolExecutor(args.encode_workers, thread_name_prefix="encode") as encode_pool:
+        try:
+            for batch in decoded_batches(todo, decode_pool, args.batch_size, args.prefetch):
+                failed = [path for path, image in batch if image is None]
+                batch = [(path, image) for path, image in batch if image is not None]
+                for path in failed:
+                    logger.error(f"Failed to decode image {path}")
+                    error = Future()
+                    error.set_result({"path": path, "error": "decode failed"})
+                    in_flight.append(error)
+
+                if batch:
+                    results = model([image for _, image in batch], imgsz=args.imgsz, verbose=False)
+                    for (path, image), result in zip(batch, results):
+                        in_flight.append(encode_pool.submit(finish, path, image, result, args.annotated, root))
+
+                # Keep roughly one batch of encodes overlapping the next inference
+                drain(args.batch_size + args.encode_workers)
+                writer.flush()
+                batches += 1
+                if batches % 10 == 0:
+                    rate = processed / (time.perf_counter() - started)
+                    logger.info(f"Processed {processed}/{len(todo)} images ({rate:.1f} img/s)")
+            drain(0)
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Processed {processed} images in {elapsed:.1f}s ({processed / elapsed:.1f} img/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect teddy bears in a directory or glob of images.")
+    parser.add_argument("sources", nargs="+", help="Image directories, files or glob patterns")
+    parser.add_argument("--model", default="best.pt", help="YOLO checkpoint (default: best.pt)")
+    parser.add_argument("--out", default="detections.jsonl", help="JSONL output file, '' to disable")
+    parser.add_argument("--csv", help="Optional CSV output file")
+    parser.add_argument("--annotated", help="Directory for annotated copies of images with detections")
+    parser.add_argument("--checkpoint", default="batch_detect.checkpoint",
+                        help="File of processed paths used to resume, '' to disable")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--imgsz", type=int, default=640, help="Inference input size")
+    parser.add_argument("--decode-workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--encode-workers", type=int, default=2)
+    parser.add_argument("--torch-threads", type=int, help="Intra-op threads for inference (default: all cores)")
+    parser.add_argument("--prefetch", type=int, default=32, help="Images decoded ahead of inference")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    args = parser.parse_args(argv)
+    if not args.out and not args.csv:
+        parser.error("at least one of --out or --csv is required")
+    args.prefetch = max(args.prefetch, args.batch_size)
+    return args
+
+
+if __name__ == "__main__":
+    run(parse_args())
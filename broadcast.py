@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+from collections import deque
+
+
+class _Subscription:
+    """Pending updates of one subscriber; only touched on its own event loop."""
+
+    __slots__ = ("loop", "counters", "events", "ready")
+
+    def __init__(self, loop, max_events):
+        self.loop = loop
+        self.counters = None
+        self.events = deque(maxlen=max_events)
+        self.ready = asyncio.Event()
+
+    def offer(self, update):
+        update = dict(update)
+        event = update.pop("event", None)
+        self.counters = update
+        if event is not None:
+            self.events.append(event)
+        self.ready.set()
+
+    def take(self):
+        update = dict(self.counters, events=list(self.events))
+        self.events.clear()
+        self.ready.clear()
+        return update
+
+
+class StatsBroadcaster:
+    """Fans stats updates out to Server-Sent Events subscribers.
+
+    Publishing never waits. Updates a slow client has not received yet are
+    coalesced: it gets the latest counters and the events recorded since its
+    last frame, of which only the newest ``queue_size`` are kept.
+    """
+
+    def __init__(self, queue_size=16):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscription = _Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, update):
+        """Queue ``update`` for every subscriber; safe to call from any thread.
+
+        ``update`` holds the counters and optionally the recorded ``event``.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for subscription in subscribers:
+            if subscription.loop is current_loop:
+                subscription.offer(update)
+            elif not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription.offer, update)
+
+    async def stream(self, snapshot, is_disconnected, heartbeat=15.0):
+        """Yield SSE frames: the current counters, then updates as they arrive.
+
+        ``snapshot()`` is read after subscribing, so nothing published in
+        between is missed.
+        """
+        subscription = self.subscribe()
+        try:
+            yield _frame(dict(snapshot(), events=[]))
+            while not await is_disconnected():
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing idle connections
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _frame(subscription.take())
+        finally:
+            self.unsubscribe(subscription)
+
+
+def _frame(update):
+    return f"event: stats\ndata: {json.dumps(update)}\n\n"
@@ -0,0 +1,255 @@
+import glob
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # the event log is disabled without pyarrow
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".arrows"
+PARTIAL_SUFFIX = ".partial"
+# IPC end-of-stream marker: continuation token followed by a zero length
+END_OF_STREAM = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("camera_id", pa.string()),
+        ("image_sha256", pa.binary(32)),
+        ("image_bytes", pa.int32()),
+        ("width", pa.int32()),
+        ("height", pa.int32()),
+        ("latency_ms", pa.float32()),
+        ("boxes", pa.list_(pa.list_(pa.float32(), 4))),
+        ("scores", pa.list_(pa.float32())),
+        ("classes", pa.list_(pa.int16())),
+        ("track_ids", pa.list_(pa.int32())),
+    ])
+
+
+class EventLog:
+    """Append-only log of every detection in Arrow IPC stream segments.
+
+    Rows are buffered and written as record batches; a segment is closed and
+    a new one started once it grows past ``max_bytes`` or ``max_seconds``.
+    The open segment carries a ``.partial`` suffix and is readable up to its
+    last complete batch, so a crash loses at most the unflushed buffer.
+    A background thread flushes buffered rows after ``flush_seconds`` and
+    closes aged segments even when no new rows arrive.
+    """
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, max_seconds=3600,
+                 batch_rows=512, flush_seconds=5.0):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the detection event log")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.batch_rows = batch_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._sink = None
+        self._writer = None
+        self._segment_path = None
+        self._segment_started = 0.0
+        self._segment_seq = 0
+        self._last_flush = time.monotonic()
+        self._reset_buffer()
+
+        os.makedirs(directory, exist_ok=True)
+        # Segments left open by a dead process are complete up to their last batch
+        for path in glob.glob(os.path.join(directory, f"*{SEGMENT_SUFFIX}{PARTIAL_SUFFIX}")):
+            if not _writer_alive(path):
+                os.replace(path, path[: -len(PARTIAL_SUFFIX)])
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="event-log-flush", daemon=True)
+        self._flusher.start()
+
+    def append(self, timestamp, camera_id, image_sha256, image_bytes, width, height,
+               latency_ms, boxes, scores, classes, track_ids=None):
+        """Buffer one detection; ``boxes`` is an ``(N, 4)`` xyxy array."""
+        with self._lock:
+            self._buffer["timestamp"].append(int(timestamp.timestamp() * 1_000_000))
+            self._buffer["camera_id"].append(camera_id)
+            self._buffer["image_sha256"].append(image_sha256)
+            self._buffer["image_bytes"].append(image_bytes)
+            self._buffer["width"].append(width)
+            self._buffer["height"].append(height)
+            self._buffer["latency_ms"].append(latency_ms)
+            self._buffer["boxes"].append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+            self._buffer["scores"].append(np.asarray(scores, dtype=np.float32).reshape(-1))
+            self._buffer["classes"].append(np.asarray(classes, dtype=np.int16).reshape(-1))
+            self._buffer["track_ids"].append(list(track_ids) if track_ids is not None else None)
+
+            if (len(self._buffer["timestamp"]) >= self.batch_rows
+                    or time.monotonic() - self._last_flush >= self.flush_seconds):
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            self._flush()
+            self._close_segment()
+
+    def export(self, start=None, end=None):
+        """Yield one Arrow IPC stream, chunk by chunk, of the events in range."""
+        self.flush()
+        yield SCHEMA.serialize().to_pybytes()
+        for batch in read_batches(list_segments(self.directory), start=start, end=end):
+            yield batch.serialize().to_pybytes()
+        yield END_OF_STREAM
+
+    def _flush_periodically(self):
+        while not self._closed.wait(min(self.flush_seconds, self.max_seconds)):
+            with self._lock:
+                now = time.monotonic()
+                if self._buffer["timestamp"] and now - self._last_flush >= self.flush_seconds:
+                    self._flush()
+                elif self._writer is not None and now - self._segment_started >= self.max_seconds:
+                    self._close_segment()
+
+    def _reset_buffer(self):
+        self._buffer = {name: [] for name in SCHEMA.names}
+
+    def _flush(self):
+        # Called with the lock held
+        self._last_flush = time.monotonic()
+        if not self._buffer["timestamp"]:
+            return
+
+        batch = self._build_batch()
+        self._reset_buffer()
+
+        if self._writer is None:
+            self._open_segment()
+        self._writer.write_batch(batch)
+        self._sink.flush()
+
+        if (self._sink.tell() >= self.max_bytes
+                or time.monotonic() - self._segment_started >= self.max_seconds):
+            self._close_segment()
+
+    def _build_batch(self):
+        buf = self._buffer
+        counts = np.array([len(s) for s in buf["scores"]], dtype=np.int32)
+        offsets = pa.array(np.concatenate([[0], np.cumsum(counts)]).astype(np.int32))
+
+        flat_boxes = pa.array(np.concatenate(buf["boxes"]).reshape(-1))
+        arrays = [
+            pa.array(buf["timestamp"], type=pa.int64()).cast(SCHEMA.field("timestamp").type),
+            pa.array(buf["camera_id"], type=pa.string()),
+            pa.array(buf["image_sha256"], type=pa.binary(32)),
+            pa.array(buf["image_bytes"], type=pa.int32()),
+            pa.array(buf["width"], type=pa.int32()),
+            pa.array(buf["height"], type=pa.int32()),
+            pa.array(buf["latency_ms"], type=pa.float32()),
+            pa.ListArray.from_arrays(offsets, pa.FixedSizeListArray.from_arrays(flat_boxes, 4)),
+            pa.ListArray.from_arrays(offsets, pa.array(np.concatenate(buf["scores"]))),
+            pa.ListArray.from_arrays(offsets, pa.array(np.concatenate(buf["classes"]))),
+            pa.array(buf["track_ids"], type=pa.list_(pa.int32())),
+        ]
+        return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+    def _open_segment(self):
+        # The sequence number keeps segments opened within the same second apart,
+        # including those of an earlier process that had the same pid
+        while True:
+            self._segment_seq += 1
+            name = (f"events-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{self._segment_seq:06d}"
+                    f"-{os.getpid()}{SEGMENT_SUFFIX}")
+            self._segment_path = os.path.join(self.directory, name)
+            if not (os.path.exists(self._segment_path)
+                    or os.path.exists(self._segment_path + PARTIAL_SUFFIX)):
+                break
+        self._sink = pa.OSFile(self._segment_path + PARTIAL_SUFFIX, "wb")
+        self._writer = pa.ipc.new_stream(self._sink, SCHEMA)
+        self._segment_started = time.monotonic()
+
+    def _close_segment(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._segment_path + PARTIAL_SUFFIX, self._segment_path)
+        logger.info(f"Closed detection event segment {self._segment_path}")
+        self._writer = self._sink = self._segment_path = None
+
+
+def _writer_alive(path):
+    # Segment names end in -<pid>.arrows; other workers may still be writing theirs
+    try:
+        pid = int(os.path.basename(path).split(SEGMENT_SUFFIX)[0].rsplit("-", 1)[1])
+        os.kill(pid, 0)
+    except (ValueError, IndexError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return pid != os.getpid()
+
+
+def list_segments(directory, include_open=True):
+    """Return segment paths in chronological order."""
+    paths = glob.glob(os.path.join(directory, f"*{SEGMENT_SUFFIX}"))
+    if include_open:
+        paths += glob.glob(os.path.join(directory, f"*{SEGMENT_SUFFIX}{PARTIAL_SUFFIX}"))
+    return sorted(paths, key=os.path.basename)
+
+
+def read_batches(paths, start=None, end=None):
+    """Yield record batches from memory-mapped segments, optionally time filtered.
+
+    ``start``/``end`` are ``datetime`` objects (naive means local time).
+    Segments are mapped rather than read, so scanning only touches the pages
+    of the columns actually used.
+    """
+    start_us = int(start.timestamp() * 1_000_000) if start is not None else None
+    end_us = int(end.timestamp() * 1_000_000) if end is not None else None
+
+    for path in paths:
+        try:
+            reader = pa.ipc.open_stream(pa.memory_map(path, "r"))
+        except (pa.ArrowInvalid, OSError) as e:
+            logger.warning(f"Skipping unreadable event segment {path}: {e}")
+            continue
+        while True:
+            try:
+                batch = reader.read_next_batch()
+            except StopIteration:
+                break
+            except pa.ArrowInvalid:
+                # Truncated tail of a segment that is still being written
+                break
+            if start_us is None and end_us is None:
+                yield batch
+                continue
+            ts = batch.column("timestamp").cast(pa.int64())
+            mask = None
+            if start_us is not None:
+                mask = pc.greater_equal(ts, start_us)
+            if end_us is not None:
+                upper = pc.less(ts, end_us)
+                mask = upper if mask is None else pc.and_(mask, upper)
+            filtered = batch.filter(mask)
+            if filtered.num_rows:
+                yield filtered
+
+
+def read_table(directory, start=None, end=None):
+    """Load every event in ``directory`` into a single ``pyarrow.Table``."""
+    batches = read_batches(list_segments(directory), start=start, end=end)
+    return pa.Table.from_batches(list(batches), schema=SCHEMA)
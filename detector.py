@@ -0,0 +1,44 @@
+import logging
+import os
+
+import cv2
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+ALERT_BORDER_SIZE = 10
+ALERT_BORDER_COLOR = (0, 0, 255)
+
+
+def build_model(model_path):
+    """Load one YOLO checkpoint fused, on CPU and in eval mode."""
+    if not os.path.exists(model_path):
+        logger.error(f"Model file not found at {model_path}")
+        raise FileNotFoundError(f"Model file not found at {model_path}")
+
+    # Load model in inference mode
+    detector = YOLO(model_path, task='detect')
+    detector.fuse()  # Fuse model layers for inference
+
+    # Force model to CPU and eval mode
+    detector.to('cpu')
+    for m in detector.modules():
+        if hasattr(m, 'eval'):
+            m.eval()
+    return detector
+
+
+def annotate(result):
+    """Draw the boxes of a result and frame the image in red."""
+    return cv2.copyMakeBorder(
+        result.plot(),
+        ALERT_BORDER_SIZE, ALERT_BORDER_SIZE, ALERT_BORDER_SIZE, ALERT_BORDER_SIZE,
+        cv2.BORDER_CONSTANT,
+        value=ALERT_BORDER_COLOR
+    )
+
+
+def box_arrays(result):
+    """Return ``(xyxy, scores, classes)`` numpy arrays for a result."""
+    boxes = result.boxes
+    return boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy()
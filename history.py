@@ -0,0 +1,209 @@
+import sqlite3
+import threading
+from datetime import datetime
+
+DETECTION = "detection"
+FALSE_ALARM = "false_alarm"
+
+BUCKET_FORMATS = {
+    "hour": "%Y-%m-%dT%H:00",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m",
+}
+
+
+def encode_cursor(ts, event_id):
+    return f"{ts!r}_{event_id}"
+
+
+def decode_cursor(cursor):
+    ts, event_id = cursor.rsplit("_", 1)
+    return float(ts), int(event_id)
+
+
+class DetectionHistory:
+    """Detection events stored in SQLite with an index on the timestamp.
+
+    Timestamps are stored as epoch seconds so range filters, keyset
+    pagination and aggregates are answered from the index instead of
+    re-parsing ISO strings.
+    """
+
+    def __init__(self, path, retention_days=None):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    kind TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    result TEXT NOT NULL,
+                    stream_id TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_events_kind_ts ON events (kind, ts)")
+
+    def is_empty(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+    def record(self, kind, count, result, timestamp=None, stream_id=None):
+        """Append one event; ``timestamp`` is a naive local ``datetime``."""
+        ts = (timestamp or datetime.now()).timestamp()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO events (ts, kind, count, result, stream_id) VALUES (?, ?, ?, ?, ?)",
+                (ts, kind, count, result, stream_id),
+            )
+            self._prune(ts)
+
+    def import_legacy(self, detections):
+        """Load the ``detections`` list of the old JSON stats file."""
+        rows = []
+        for detection in detections:
+            try:
+                ts = datetime.fromisoformat(detection["timestamp"]).timestamp()
+                result = detection["result"]
+            except (ValueError, KeyError):
+                continue
+            if result.startswith("No teddy bears detected"):
+                rows.append((ts, FALSE_ALARM, 0, result, detection.get("stream_id")))
+            else:
+                count = len(detection.get("track_ids", [])) or _parse_count(result)
+                rows.append((ts, DETECTION, count, result, detection.get("stream_id")))
+        rows.sort(key=lambda row: row[0])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO events (ts, kind, count, result, stream_id) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def query(self, start=None, end=None, kind=None, stream_id=None, limit=50, cursor=None):
+        """Return a page of events, newest first, and the cursor of the next page."""
+        where, params = self._filters(start, end, kind, stream_id)
+        if cursor:
+            ts, event_id = decode_cursor(cursor)
+            where.append("(ts < ? OR (ts = ? AND id < ?))")
+            params.extend([ts, ts, event_id])
+
+        sql = "SELECT id, ts, kind, count, result, stream_id FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["ts"], rows[-1]["id"])
+
+        events = [
+            {
+                "id": row["id"],
+                "timestamp": datetime.fromtimestamp(row["ts"]).isoformat(),
+                "kind": row["kind"],
+                "count": row["count"],
+                "result": row["result"],
+                "stream_id": row["stream_id"],
+            }
+            for row in rows
+        ]
+        return events, next_cursor
+
+    def aggregate(self, start=None, end=None, stream_id=None, bucket="day"):
+        """Sum detections and false alarms per time bucket, plus overall totals."""
+        where, params = self._filters(start, end, None, stream_id)
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        bucket_sql = (
+            "SELECT strftime(?, ts, 'unixepoch', 'localtime') AS bucket, "
+            "SUM(CASE WHEN kind = ? THEN count ELSE 0 END) AS detections, "
+            "SUM(CASE WHEN kind = ? THEN 1 ELSE 0 END) AS false_alarms "
+            f"FROM events{clause} GROUP BY bucket ORDER BY bucket"
+        )
+        totals_sql = (
+            "SELECT COUNT(*) AS events, "
+            "COALESCE(SUM(CASE WHEN kind = ? THEN count ELSE 0 END), 0) AS detections, "
+            "COALESCE(SUM(CASE WHEN kind = ? THEN 1 ELSE 0 END), 0) AS false_alarms, "
+            f"MIN(ts) AS first_ts, MAX(ts) AS last_ts FROM events{clause}"
+        )
+
+        with self._lock:
+            buckets = self._conn.execute(
+                bucket_sql, [BUCKET_FORMATS[bucket], DETECTION, FALSE_ALARM] + params
+            ).fetchall()
+            totals = self._conn.execute(totals_sql, [DETECTION, FALSE_ALARM] + params).fetchone()
+
+        return {
+            "bucket": bucket,
+            "buckets": [dict(row) for row in buckets],
+            "totals": {
+                "events": totals["events"],
+                "detections": totals["detections"],
+                "false_alarms": totals["false_alarms"],
+                "first": _iso(totals["first_ts"]),
+                "last": _iso(totals["last_ts"]),
+            },
+        }
+
+    def count(self, kind, start=None, end=None):
+        where, params = self._filters(start, end, kind, None)
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM events" + clause, params).fetchone()
+        return row[0]
+
+    def span(self):
+        """Return the earliest and latest event time, or ``(None, None)``."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(ts), MAX(ts) FROM events").fetchone()
+        if row[0] is None:
+            return None, None
+        return datetime.fromtimestamp(row[0]), datetime.fromtimestamp(row[1])
+
+    def _filters(self, start, end, kind, stream_id):
+        where, params = [], []
+        if start is not None:
+            where.append("ts >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            where.append("ts < ?")
+            params.append(end.timestamp())
+        if kind is not None:
+            where.append("kind = ?")
+            params.append(kind)
+        if stream_id is not None:
+            where.append("stream_id = ?")
+            params.append(stream_id)
+        return where, params
+
+    def _prune(self, now):
+        # Called with the lock held; prunes at most once an hour
+        if not self.retention_days or now - self._last_prune < 3600:
+            return
+        self._last_prune = now
+        self._conn.execute("DELETE FROM events WHERE ts < ?", (now - self.retention_days * 86400,))
+
+
+def _parse_count(result):
+    for word in result.split():
+        if word.isdigit():
+            return int(word)
+    return 1
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat() if ts is not None else None
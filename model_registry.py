@@ -0,0 +1,146 @@
+import gc
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import torch
+
+from detector import build_model
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSpec:
+    """Where a named detector's weights live and which classes it reports."""
+
+    __slots__ = ("name", "path", "classes")
+
+    def __init__(self, name, path, classes=None):
+        self.name = name
+        self.path = path
+        self.classes = classes
+
+
+def parse_model_specs(spec):
+    """Parse ``"primary=best.pt;coco=yolov8n.pt:0,77"`` into ``{name: ModelSpec}``.
+
+    The optional ``:classes`` suffix restricts a model to those class ids.
+    """
+    specs = OrderedDict()
+    for item in spec.split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, rest = item.partition("=")
+        if not sep or not name.strip() or not rest.strip():
+            raise ValueError(f"Invalid model spec '{item}', expected name=path[:classes]")
+        path, _, classes = rest.partition(":")
+        class_ids = [int(c) for c in classes.split(",") if c.strip()] if classes else None
+        specs[name.strip()] = ModelSpec(name.strip(), path.strip(), class_ids)
+    if not specs:
+        raise ValueError("At least one model is required")
+    return specs
+
+
+def model_bytes(detector):
+    """Approximate resident size of a model from its parameters and buffers."""
+    module = detector.model
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class ModelRegistry:
+    """Loads named detectors on first use and evicts them LRU under a memory budget.
+
+    Models in use are pinned through ``acquire()`` and never evicted; if the
+    pinned set alone exceeds the budget the registry goes over it rather than
+    failing the request.
+    """
+
+    def __init__(self, specs, memory_budget_bytes=None):
+        self.specs = specs
+        self.memory_budget_bytes = memory_budget_bytes
+        self._models = OrderedDict()  # name -> (detector, size in bytes)
+        self._pins = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self.specs
+
+    def loaded(self):
+        with self._lock:
+            return {name: size for name, (_, size) in self._models.items()}
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(size for _, size in self._models.values())
+
+    @contextmanager
+    def acquire(self, name):
+        """Yield the detector ``name``, loading it if needed and pinning it meanwhile."""
+        detector = self._get(name)
+        try:
+            yield detector
+        finally:
+            with self._lock:
+                self._pins[name] -= 1
+
+    def _get(self, name):
+        if name not in self.specs:
+            raise KeyError(f"Unknown model '{name}'")
+
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                self._pins[name] = self._pins.get(name, 0) + 1
+                return entry[0]
+
+        # Loads are serialized so two requests never load the same weights twice
+        with self._load_lock:
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    self._models.move_to_end(name)
+                    self._pins[name] = self._pins.get(name, 0) + 1
+                    return entry[0]
+
+            spec = self.specs[name]
+            logger.info(f"Loading model '{name}' from {spec.path}...")
+            detector = build_model(spec.path)
+            size = model_bytes(detector)
+
+            with self._lock:
+                self._models[name] = (detector, size)
+                self._pins[name] = self._pins.get(name, 0) + 1
+                evicted = self._evict()
+            logger.info(f"Model '{name}' loaded ({size / 2**20:.1f} MiB)")
+
+        if evicted:
+            logger.info(f"Evicted models {', '.join(evicted)} to stay within the memory budget")
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return detector
+
+    def _evict(self):
+        # Called with the lock held
+        evicted = []
+        if not self.memory_budget_bytes:
+            return evicted
+        total = sum(size for _, size in self._models.values())
+        for name in list(self._models):
+            if total <= self.memory_budget_bytes:
+                break
+            if self._pins.get(name, 0) > 0:
+                continue
+            total -= self._models.pop(name)[1]
+            evicted.append(name)
+        if total > self.memory_budget_bytes:
+            logger.warning(
+                f"Pinned models use {total / 2**20:.1f} MiB, over the "
+                f"{self.memory_budget_bytes / 2**20:.1f} MiB budget"
+            )
+        return evicted
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import deque
+
+
+class Tier:
+    """One rung of the degradation ladder: a model name and an input size."""
+
+    __slots__ = ("model", "imgsz")
+
+    def __init__(self, model, imgsz):
+        self.model = model
+        self.imgsz = imgsz
+
+    @property
+    def name(self):
+        return f"{self.model}@{self.imgsz}"
+
+
+def parse_tiers(spec):
+    """Parse ``"640,480,320,fallback@320"`` into tiers, best quality first.
+
+    Bare sizes serve the requested models; ``name@size`` serves that model instead.
+    """
+    tiers = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        model_name, _, size = item.rpartition("@")
+        tiers.append(Tier(model_name or "primary", int(size)))
+    if not tiers:
+        raise ValueError("At least one inference tier is required")
+    return tiers
+
+
+class OverloadController:
+    """Steps inference down the tier ladder under load and back up when it clears.
+
+    Load is judged from the number of requests waiting for or running
+    inference and from the p95 end-to-end latency of the recent window
+    against ``latency_slo_ms``. Requests beyond ``max_queue`` are shed.
+    """
+
+    def __init__(self, tiers, latency_slo_ms=1000.0, max_queue=16, step_down_queue=2,
+                 cooldown=5.0, window=32, window_seconds=30.0, recover_ratio=0.5):
+        self.tiers = tiers
+        self.latency_slo_ms = latency_slo_ms
+        self.max_queue = max_queue
+        self.step_down_queue = step_down_queue
+        self.cooldown = cooldown
+        self.recover_ratio = recover_ratio
+        self.window_seconds = window_seconds
+        self.level = 0
+        self.pending = 0
+        self.shed = 0
+        self._latencies = deque(maxlen=window)
+        self._last_change = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def tier(self):
+        return self.tiers[self.level]
+
+    def admit(self):
+        """Reserve a slot, returning the tier to serve at or ``None`` to shed."""
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.shed += 1
+                return None
+            self.pending += 1
+            if self.pending > self.step_down_queue:
+                self._step(+1)
+            return self.tier
+
+    def release(self, latency_ms):
+        """Record the end-to-end latency of an admitted request."""
+        with self._lock:
+            self.pending -= 1
+            self._latencies.append((time.monotonic(), latency_ms))
+            p95 = self._p95()
+            if p95 > self.latency_slo_ms:
+                self._step(+1)
+            elif (self.pending <= self.step_down_queue
+                    and p95 < self.latency_slo_ms * self.recover_ratio):
+                # Steady traffic under the queue threshold recovers too, not only an idle server
+                self._step(-1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "tier": self.tier.name,
+                "level": self.level,
+                "pending": self.pending,
+                "shed": self.shed,
+                "p95_ms": round(self._p95(), 1),
+                "latency_slo_ms": self.latency_slo_ms,
+            }
+
+    def _p95(self):
+        # Only recent samples count, so a quiet period lets the tier recover
+        cutoff = time.monotonic() - self.window_seconds
+        while self._latencies and self._latencies[0][0] < cutoff:
+            self._latencies.popleft()
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(latency for _, latency in self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def _step(self, direction):
+        # Called with the lock held
+        level = min(max(self.level + direction, 0), len(self.tiers) - 1)
+        now = time.monotonic()
+        if level == self.level or now - self._last_change < self.cooldown:
+            return
+        self.level = level
+        self._last_change = now
+        # Latencies measured at the previous tier no longer apply
+        self._latencies.clear()
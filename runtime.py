@@ -0,0 +1,73 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_budget(processes=1, concurrent_inferences=1):
+    """Cores available to one inference when ``processes`` workers share the host."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return max(1, cpus // max(1, processes * concurrent_inferences))
+
+
+def configure_threads(intra_op, interop=None, cv2_threads=None):
+    """Apply torch intra-/inter-op and OpenCV thread counts for this process."""
+    torch.set_num_threads(intra_op)
+    if interop is not None:
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError as e:
+            # Only allowed before torch starts its inter-op pool
+            logger.warning(f"Could not set torch inter-op threads: {str(e)}")
+    if cv2_threads is not None:
+        cv2.setNumThreads(cv2_threads)
+    logger.info(
+        f"Thread configuration: torch intra-op={torch.get_num_threads()}, "
+        f"inter-op={torch.get_num_interop_threads()}, opencv={cv2.getNumThreads()}"
+    )
+
+
+def candidate_thread_counts(budget):
+    """A handful of intra-op thread counts worth benchmarking for ``budget`` cores."""
+    return sorted({1, 2, max(1, budget // 2), budget} & set(range(1, budget + 1)))
+
+
+def autotune(infer, candidates, concurrency=1, imgsz=640, warmup=2, iterations=6):
+    """Benchmark ``infer(image)`` at each intra-op thread count and keep the fastest.
+
+    ``concurrency`` inferences run side by side so oversubscription shows up
+    in the measurement; only use more than one when each caller has its own
+    model instance, since a shared YOLO predictor serializes calls.
+    Returns ``(best_threads, {threads: images_per_second})``.
+    """
+    image = np.random.default_rng(0).integers(0, 256, (imgsz, imgsz, 3), dtype=np.uint8)
+    throughput = {}
+
+    for threads in candidates:
+        torch.set_num_threads(threads)
+        # Torch fixes a thread's intra-op count on its first parallel op, so
+        # every candidate is measured on fresh worker threads set up for it
+        with ThreadPoolExecutor(
+            max_workers=concurrency, initializer=torch.set_num_threads, initargs=(threads,)
+        ) as pool:
+            list(pool.map(lambda _: infer(image), range(warmup * concurrency)))
+
+            start = time.perf_counter()
+            list(pool.map(lambda _: infer(image), range(iterations * concurrency)))
+            elapsed = time.perf_counter() - start
+        throughput[threads] = iterations * concurrency / elapsed
+        logger.info(f"Autotune: {threads} intra-op threads -> {throughput[threads]:.2f} img/s")
+
+    best = max(throughput, key=throughput.get)
+    torch.set_num_threads(best)
+    logger.info(f"Autotune selected {best} intra-op threads")
+    return best, throughput
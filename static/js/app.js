@@ -0,0 +1,256 @@
+const dropZone = document.getElementById('dropZone');
+const fileInput = document.getElementById('fileInput');
+const loading = document.getElementById('loading');
+const resultImage = document.getElementById('resultImage');
+const errorDiv = document.getElementById('error');
+const messageDiv = document.getElementById('message');
+const alert = document.getElementById('alert');
+const alertText = document.getElementById('alertText');
+
+dropZone.addEventListener('click', () => fileInput.click());
+
+dropZone.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    dropZone.classList.add('dragover');
+});
+
+dropZone.addEventListener('dragleave', () => {
+    dropZone.classList.remove('dragover');
+});
+
+dropZone.addEventListener('drop', (e) => {
+    e.preventDefault();
+    dropZone.classList.remove('dragover');
+    const file = e.dataTransfer.files[0];
+    if (file) processFile(file);
+});
+
+fileInput.addEventListener('change', (e) => {
+    const file = e.target.files[0];
+    if (file) processFile(file);
+});
+
+async function processFile(file) {
+    loading.style.display = 'block';
+    resultImage.style.display = 'none';
+    errorDiv.style.display = 'none';
+    messageDiv.style.display = 'none';
+    alert.style.display = 'none';
+
+    const formData = new FormData();
+    formData.append('file', file);
+
+    try {
+        const response = await fetch('/detect/', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (response.ok) {
+            const data = await response.json();
+            if (data.error) {
+                errorDiv.textContent = 'Error: ' + data.error;
+                errorDiv.style.display = 'block';
+            } else {
+                resultImage.src = 'data:image/jpeg;base64,' + data.image;
+                resultImage.style.display = 'block';
+
+                if (data.teddy_detected) {
+                    const count = data.teddy_count;
+                    alert.style.display = 'block';
+                    alertText.textContent = `ALERT: ${count} Teddy Bear${count > 1 ? 's' : ''} Detected!`;
+                    updateHistoryStats(true);
+                } else if (data.message) {
+                    messageDiv.textContent = data.message;
+                    messageDiv.style.display = 'block';
+                    updateHistoryStats(false);
+                }
+            }
+        } else {
+            const error = await response.json();
+            errorDiv.textContent = 'Error: ' + (error.detail || 'Failed to process image');
+            errorDiv.style.display = 'block';
+        }
+    } catch (error) {
+        errorDiv.textContent = 'Error: ' + error.message;
+        errorDiv.style.display = 'block';
+    } finally {
+        loading.style.display = 'none';
+    }
+}
+
+let detectionChart = null;
+
+function processDetectionData(aggregate) {
+    // Buckets are already summed per day by the server
+    return {
+        labels: aggregate.buckets.map(b => b.bucket),
+        detections: aggregate.buckets.map(b => b.detections),
+        falseAlarms: aggregate.buckets.map(b => b.false_alarms)
+    };
+}
+
+function updateChart(aggregate) {
+    const chartData = processDetectionData(aggregate);
+
+    if (detectionChart) {
+        detectionChart.destroy();
+    }
+
+    detectionChart = new BarChart(document.getElementById('detectionChart'), {
+        labels: chartData.labels,
+        datasets: [
+            {
+                label: 'Teddy Bears Detected',
+                data: chartData.detections,
+                backgroundColor: 'rgba(26, 115, 232, 0.5)',
+                borderColor: 'rgba(26, 115, 232, 1)'
+            },
+            {
+                label: 'False Alarms',
+                data: chartData.falseAlarms,
+                backgroundColor: 'rgba(255, 152, 0, 0.5)',
+                borderColor: 'rgba(255, 152, 0, 1)'
+            }
+        ],
+        xTitle: 'Date',
+        yTitle: 'Number of Events'
+    });
+}
+
+let historyCursor = null;
+
+function appendDetections(events) {
+    const detectionList = document.getElementById('detectionList');
+    events.forEach(detection => {
+        const item = document.createElement('div');
+        item.className = 'detection-item';
+        item.innerHTML = `
+            <span>${detection.result}</span>
+            <span>${new Date(detection.timestamp).toLocaleString()}</span>
+        `;
+        detectionList.appendChild(item);
+    });
+}
+
+let loadingMore = false;
+
+async function loadMoreDetections() {
+    if (!historyCursor || loadingMore) return;
+    loadingMore = true;
+    try {
+        const response = await fetch('/history?limit=50&cursor=' + encodeURIComponent(historyCursor));
+        const page = await response.json();
+        historyCursor = page.next_cursor;
+        appendDetections(page.events);
+    } finally {
+        loadingMore = false;
+    }
+}
+
+// Days of history the chart covers, so opening the modal stays cheap
+const CHART_DAYS = 30;
+
+function chartStartDate() {
+    const start = new Date();
+    start.setDate(start.getDate() - CHART_DAYS + 1);
+    const pad = n => String(n).padStart(2, '0');
+    return `${start.getFullYear()}-${pad(start.getMonth() + 1)}-${pad(start.getDate())}`;
+}
+
+async function openStats() {
+    try {
+        const [stats, aggregate, page] = await Promise.all([
+            fetch('/stats').then(r => r.json()),
+            fetch('/history/aggregate?bucket=day&start=' + chartStartDate()).then(r => r.json()),
+            fetch('/history?limit=50').then(r => r.json())
+        ]);
+
+        document.getElementById('totalDetections').textContent = stats.total_detections;
+        document.getElementById('totalFalseAlarms').textContent = stats.total_false_alarms;
+
+        document.getElementById('detectionList').innerHTML = '';
+        historyCursor = page.next_cursor;
+        appendDetections(page.events);
+
+        document.getElementById('statsModal').style.display = 'block';
+
+        // Drawn once the modal is visible, the chart sizes itself to it
+        updateChart(aggregate);
+    } catch (error) {
+        console.error('Error fetching stats:', error);
+    }
+}
+
+// Fetch the next page when the list is scrolled to the bottom
+document.getElementById('detectionList').addEventListener('scroll', (e) => {
+    const list = e.target;
+    if (list.scrollTop + list.clientHeight >= list.scrollHeight - 20) {
+        loadMoreDetections();
+    }
+});
+
+function closeStats() {
+    document.getElementById('statsModal').style.display = 'none';
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const modal = document.getElementById('statsModal');
+    if (event.target == modal) {
+        modal.style.display = 'none';
+    }
+}
+
+// Counters pushed by /stats/stream; the widget re-renders as they change
+let liveStats = null;
+let historyMode = null;
+
+function renderHistoryStats() {
+    if (!liveStats || historyMode === null) return;
+
+    const historyStats = document.getElementById('historyStats');
+    const historyText = document.getElementById('historyText');
+
+    if (historyMode) {
+        historyStats.className = 'history-stats with-detection';
+        historyText.textContent = `⚠️ Security Alert: ${liveStats.total_detections} teddy bear intrusions recorded in the surveillance period`;
+    } else {
+        historyStats.className = 'history-stats with-false-alarm';
+        historyText.textContent = `System Status: ${liveStats.total_false_alarms} false alarms during surveillance period`;
+    }
+
+    historyStats.style.display = 'block';
+}
+
+function updateHistoryStats(teddy_detected) {
+    historyMode = teddy_detected;
+    renderHistoryStats();
+}
+
+function connectStatsStream() {
+    const source = new EventSource('/stats/stream');
+    source.addEventListener('stats', (e) => {
+        liveStats = JSON.parse(e.data);
+        renderHistoryStats();
+
+        // Keep the statistics modal current while it is open
+        if (document.getElementById('statsModal').style.display === 'block') {
+            document.getElementById('totalDetections').textContent = liveStats.total_detections;
+            document.getElementById('totalFalseAlarms').textContent = liveStats.total_false_alarms;
+            const detectionList = document.getElementById('detectionList');
+            liveStats.events.forEach(event => {
+                const item = document.createElement('div');
+                item.className = 'detection-item';
+                item.innerHTML = `
+                    <span>${event.result}</span>
+                    <span>${new Date(event.timestamp).toLocaleString()}</span>
+                `;
+                detectionList.insertBefore(item, detectionList.firstChild);
+            });
+        }
+    });
+    // EventSource reconnects on its own and replays the snapshot
+}
+
+connectStatsStream();
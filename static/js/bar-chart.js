@@ -0,0 +1,114 @@
+// Minimal grouped bar chart drawn on a canvas, so the dashboard has no
+// third-party or network dependency.
+class BarChart {
+    constructor(canvas, { labels, datasets, xTitle = '', yTitle = '' }) {
+        this.canvas = canvas;
+        this.labels = labels;
+        this.datasets = datasets;
+        this.xTitle = xTitle;
+        this.yTitle = yTitle;
+        this.onResize = () => this.draw();
+        window.addEventListener('resize', this.onResize);
+        this.draw();
+    }
+
+    destroy() {
+        window.removeEventListener('resize', this.onResize);
+        const ctx = this.canvas.getContext('2d');
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+    }
+
+    draw() {
+        const parent = this.canvas.parentElement;
+        const width = parent.clientWidth - 40;
+        const height = parent.clientHeight - 40;
+        if (width <= 0 || height <= 0) return;
+
+        // Render at device resolution so text and edges stay sharp
+        const ratio = window.devicePixelRatio || 1;
+        this.canvas.width = width * ratio;
+        this.canvas.height = height * ratio;
+        this.canvas.style.width = width + 'px';
+        this.canvas.style.height = height + 'px';
+
+        const ctx = this.canvas.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = '12px Arial, sans-serif';
+
+        const plot = { left: 60, top: 40, right: width - 10, bottom: height - 60 };
+        const maxValue = Math.max(1, ...this.datasets.flatMap(d => d.data));
+        const step = Math.max(1, Math.ceil(maxValue / 8));
+        const yMax = Math.ceil(maxValue / step) * step;
+        const y = value => plot.bottom - (value / yMax) * (plot.bottom - plot.top);
+
+        this.drawLegend(ctx, width);
+
+        // Horizontal grid lines and integer ticks
+        ctx.textAlign = 'right';
+        ctx.textBaseline = 'middle';
+        for (let value = 0; value <= yMax; value += step) {
+            ctx.strokeStyle = value === 0 ? '#666' : '#e1e4e8';
+            ctx.beginPath();
+            ctx.moveTo(plot.left, y(value));
+            ctx.lineTo(plot.right, y(value));
+            ctx.stroke();
+            ctx.fillStyle = '#666';
+            ctx.fillText(value, plot.left - 8, y(value));
+        }
+
+        // One group of bars per label
+        const groupWidth = (plot.right - plot.left) / Math.max(1, this.labels.length);
+        const barWidth = (groupWidth * 0.8) / this.datasets.length;
+        const labelEvery = Math.ceil(this.labels.length / Math.max(1, Math.floor((plot.right - plot.left) / 70)));
+        this.labels.forEach((label, i) => {
+            const groupLeft = plot.left + i * groupWidth + groupWidth * 0.1;
+            this.datasets.forEach((dataset, j) => {
+                const x = groupLeft + j * barWidth;
+                const top = y(dataset.data[i] || 0);
+                ctx.fillStyle = dataset.backgroundColor;
+                ctx.fillRect(x, top, barWidth, plot.bottom - top);
+                ctx.strokeStyle = dataset.borderColor;
+                ctx.strokeRect(x + 0.5, top + 0.5, barWidth - 1, plot.bottom - top);
+            });
+            if (i % labelEvery === 0) {
+                ctx.fillStyle = '#666';
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'top';
+                ctx.fillText(label, plot.left + (i + 0.5) * groupWidth, plot.bottom + 8);
+            }
+        });
+
+        // Axis titles
+        ctx.fillStyle = '#333';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'bottom';
+        ctx.fillText(this.xTitle, (plot.left + plot.right) / 2, height - 4);
+        ctx.save();
+        ctx.translate(14, (plot.top + plot.bottom) / 2);
+        ctx.rotate(-Math.PI / 2);
+        ctx.textBaseline = 'middle';
+        ctx.fillText(this.yTitle, 0, 0);
+        ctx.restore();
+    }
+
+    drawLegend(ctx, width) {
+        const swatch = 30;
+        const gap = 20;
+        const items = this.datasets.map(d => ({ dataset: d, width: swatch + 6 + ctx.measureText(d.label).width }));
+        let x = (width - items.reduce((sum, item) => sum + item.width, 0) - gap * (items.length - 1)) / 2;
+
+        ctx.textAlign = 'left';
+        ctx.textBaseline = 'middle';
+        items.forEach(({ dataset, width: itemWidth }) => {
+            ctx.fillStyle = dataset.backgroundColor;
+            ctx.fillRect(x, 6, swatch, 12);
+            ctx.strokeStyle = dataset.borderColor;
+            ctx.strokeRect(x + 0.5, 6.5, swatch - 1, 11);
+            ctx.fillStyle = '#333';
+            ctx.fillText(dataset.label, x + swatch + 6, 12);
+            x += itemWidth + gap;
+        });
+    }
+}
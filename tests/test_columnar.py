@@ -0,0 +1,43 @@
+import time
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pyarrow")
+
+from columnar import EventLog, list_segments, read_table
+
+
+def append_rows(log, count):
+    for i in range(count):
+        log.append(
+            timestamp=datetime.now(),
+            camera_id="cam",
+            image_sha256=bytes(32),
+            image_bytes=100 + i,
+            width=640,
+            height=480,
+            latency_ms=12.5,
+            boxes=[[0, 0, 10, 10]],
+            scores=[0.9],
+            classes=[77],
+        )
+
+
+def test_segments_rolled_within_one_second_keep_their_rows(tmp_path):
+    log = EventLog(str(tmp_path), max_bytes=1, batch_rows=2)
+    append_rows(log, 6)
+    log.close()
+
+    assert len(list_segments(str(tmp_path), include_open=False)) == 3
+    assert read_table(str(tmp_path)).num_rows == 6
+
+
+def test_idle_buffer_is_flushed_by_the_timer(tmp_path):
+    log = EventLog(str(tmp_path), batch_rows=512, flush_seconds=0.05)
+    append_rows(log, 1)
+    time.sleep(0.5)
+
+    assert read_table(str(tmp_path)).num_rows == 1
+    log.close()
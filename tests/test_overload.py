@@ -0,0 +1,59 @@
+from overload import OverloadController, parse_tiers
+
+
+def make_controller(**kwargs):
+    options = dict(latency_slo_ms=1000.0, max_queue=16, step_down_queue=2, cooldown=0)
+    options.update(kwargs)
+    return OverloadController(parse_tiers("640,480,320"), **options)
+
+
+def spike(controller, requests):
+    for _ in range(requests):
+        assert controller.admit() is not None
+
+
+def test_parse_tiers():
+    tiers = parse_tiers("640, 480,fallback@320")
+    assert [tier.name for tier in tiers] == ["primary@640", "primary@480", "fallback@320"]
+
+
+def test_queue_spike_steps_down():
+    controller = make_controller()
+    spike(controller, 4)
+    assert controller.tier.name == "primary@320"
+
+
+def test_steady_traffic_after_spike_steps_back_up():
+    controller = make_controller()
+    spike(controller, 4)
+    for _ in range(3):
+        controller.release(100.0)
+    assert controller.pending == 1
+
+    # One request stays in flight throughout, so the server is never idle
+    for _ in range(10):
+        controller.admit()
+        controller.release(100.0)
+
+    assert controller.pending == 1
+    assert controller.tier.name == "primary@640"
+
+
+def test_slow_requests_keep_the_degraded_tier():
+    controller = make_controller()
+    spike(controller, 4)
+    for _ in range(3):
+        controller.release(1500.0)
+
+    for _ in range(10):
+        controller.admit()
+        controller.release(1500.0)
+
+    assert controller.tier.name == "primary@320"
+
+
+def test_requests_past_max_queue_are_shed():
+    controller = make_controller(max_queue=2)
+    spike(controller, 2)
+    assert controller.admit() is None
+    assert controller.snapshot()["shed"] == 1
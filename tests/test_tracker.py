@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from tracker import StreamTracker
+
+BOX = [10, 10, 50, 50]
+MOVED = [12, 11, 52, 51]
+
+
+def test_confident_box_spawns_a_confirmed_track():
+    tracker = StreamTracker()
+    track_ids, new = tracker.update([BOX], [0.9])
+
+    assert track_ids == [1]
+    assert new == [1]
+
+    track_ids, new = tracker.update([MOVED], [0.9])
+    assert track_ids == [1]
+    assert new == []
+
+
+def test_low_confidence_box_keeps_an_existing_track_alive():
+    tracker = StreamTracker()
+    tracker.update([BOX], [0.9])
+
+    track_ids, new = tracker.update([MOVED], [0.2], max_age=0)
+    assert track_ids == [1]
+    assert new == []
+    assert tracker.ids.tolist() == [1]
+
+
+def test_low_confidence_box_does_not_spawn():
+    tracker = StreamTracker()
+    track_ids, new = tracker.update([BOX], [0.2])
+
+    assert track_ids == [-1]
+    assert new == []
+    assert len(tracker.ids) == 0
+
+
+def test_track_is_confirmed_after_min_hits():
+    tracker = StreamTracker()
+    assert tracker.update([BOX], [0.9], min_hits=3)[1] == []
+    assert tracker.update([MOVED], [0.9], min_hits=3)[1] == []
+    assert tracker.update([BOX], [0.9], min_hits=3)[1] == [1]
+    assert tracker.update([MOVED], [0.9], min_hits=3)[1] == []
+
+
+def test_track_expires_after_max_age_missed_frames():
+    tracker = StreamTracker()
+    tracker.update([BOX], [0.9])
+
+    for _ in range(2):
+        tracker.update([], [], max_age=2)
+    assert tracker.ids.tolist() == [1]
+
+    tracker.update([], [], max_age=2)
+    assert len(tracker.ids) == 0
+
+    # The same teddy bear coming back is a new track
+    track_ids, new = tracker.update([BOX], [0.9], max_age=2)
+    assert track_ids == [2]
+    assert new == [2]
@@ -0,0 +1,128 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+# Trace id of the request being handled, picked up by TraceIdFilter
+current_trace_id = contextvars.ContextVar("trace_id", default="-")
+
+
+class TraceIdFilter(logging.Filter):
+    """Adds ``%(trace_id)s`` to every log record."""
+
+    def filter(self, record):
+        record.trace_id = current_trace_id.get()
+        return True
+
+
+class Trace:
+    """Timing of one request, broken down into named pipeline stages."""
+
+    def __init__(self, trace_id=None, **attrs):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.started_at = datetime.now()
+        self.attrs = attrs
+        self.spans = []
+        self._start = time.perf_counter()
+        self._token = current_trace_id.set(self.trace_id)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, (time.perf_counter() - start) * 1000)
+
+    def add_span(self, name, duration_ms):
+        self.spans.append((name, duration_ms))
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        current_trace_id.reset(self._token)
+        return self.total_ms
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "started_at": self.started_at.isoformat(),
+            "total_ms": round(self.total_ms, 2),
+            "stages": {name: round(ms, 2) for name, ms in self.spans},
+            **self.attrs,
+        }
+
+
+def run_in_executor(executor, func, *args):
+    """``loop.run_in_executor`` that keeps the caller's trace id in the worker's logs."""
+    context = contextvars.copy_context()
+    return asyncio.get_running_loop().run_in_executor(executor, context.run, func, *args)
+
+
+class SlowRequestLog:
+    """Keeps the ``capacity`` slowest traces seen so far in a min-heap."""
+
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        entry = (trace.total_ms, next(self._seq), trace.to_dict())
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, entry)
+            elif entry[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, entry)
+
+    def slowest(self, limit=None):
+        with self._lock:
+            ordered = sorted(self._heap, reverse=True)
+        return [record for _, _, record in ordered[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+
+
+def sample_stacks(seconds=10.0, interval=0.005, max_stacks=200):
+    """Sample every thread's stack and return the hottest collapsed stacks.
+
+    Stacks are folded into ``frame;frame;frame`` strings (outermost first),
+    the format flame graph tools read. Runs in the calling thread, so call it
+    off the event loop.
+    """
+    own_id = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    stacks = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            frames = traceback.StackSummary.extract(traceback.walk_stack(frame), lookup_lines=False)
+            frames.reverse()
+            folded = ";".join(f"{f.name} ({f.filename.rsplit('/', 1)[-1]}:{f.lineno})" for f in frames)
+            stacks[f"{names.get(thread_id, thread_id)};{folded}"] += 1
+        samples += 1
+        time.sleep(interval)
+
+    return {
+        "seconds": seconds,
+        "samples": samples,
+        "stacks": [
+            {"stack": stack, "count": count}
+            for stack, count in stacks.most_common(max_stacks)
+        ],
+    }
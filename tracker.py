@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def iou_matrix(a, b):
+    """Compute the pairwise IoU between two sets of xyxy boxes."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def greedy_match(iou, threshold):
+    """Greedily pair rows and columns of an IoU matrix, best overlap first."""
+    matches = []
+    if iou.size == 0:
+        return matches
+
+    used_rows, used_cols = set(), set()
+    order = np.argsort(-iou, axis=None)
+    for flat in order:
+        row, col = divmod(int(flat), iou.shape[1])
+        if iou[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+class StreamTracker:
+    """ByteTrack-style IoU tracker holding the state of a single stream.
+
+    Only the last box of each live track is kept, so the footprint is a few
+    small arrays per stream regardless of how long the stream has been running.
+    """
+
+    __slots__ = ("boxes", "ids", "hits", "misses", "next_id", "last_seen")
+
+    def __init__(self):
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int32)
+        self.hits = np.zeros(0, dtype=np.int32)
+        self.misses = np.zeros(0, dtype=np.int32)
+        self.next_id = 1
+        self.last_seen = time.monotonic()
+
+    def update(self, boxes, scores, high_thresh=0.5, match_thresh=0.3, max_age=30, min_hits=1):
+        """Associate a frame's detections with the live tracks.
+
+        Returns ``(track_ids, new_track_ids)`` where ``track_ids`` holds one id
+        per input box (``-1`` for unmatched low-confidence boxes) and
+        ``new_track_ids`` lists the tracks confirmed for the first time on this
+        frame.
+        """
+        self.last_seen = time.monotonic()
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        track_ids = np.full(len(boxes), -1, dtype=np.int32)
+
+        high = np.flatnonzero(scores >= high_thresh)
+        low = np.flatnonzero(scores < high_thresh)
+        unmatched_tracks = np.arange(len(self.ids))
+        matched_tracks = []
+
+        # First pass matches confident boxes, second pass lets weak boxes keep
+        # an existing track alive (the ByteTrack trick for occlusions).
+        for det_idx in (high, low):
+            if len(det_idx) == 0 or len(unmatched_tracks) == 0:
+                continue
+            iou = iou_matrix(self.boxes[unmatched_tracks], boxes[det_idx])
+            pairs = greedy_match(iou, match_thresh)
+            for row, col in pairs:
+                t, d = unmatched_tracks[row], det_idx[col]
+                self.boxes[t] = boxes[d]
+                track_ids[d] = self.ids[t]
+                matched_tracks.append(t)
+            taken = {row for row, _ in pairs}
+            unmatched_tracks = np.array(
+                [t for i, t in enumerate(unmatched_tracks) if i not in taken],
+                dtype=np.intp,
+            )
+
+        matched_tracks = np.array(matched_tracks, dtype=np.intp)
+        previously_confirmed = self.hits >= min_hits
+        self.hits[matched_tracks] += 1
+        self.misses[matched_tracks] = 0
+        self.misses[unmatched_tracks] += 1
+        newly_confirmed = self.ids[(self.hits >= min_hits) & ~previously_confirmed].tolist()
+
+        # Spawn tracks for confident boxes that matched nothing
+        spawn = [d for d in high if track_ids[d] == -1]
+        if spawn:
+            new_ids = np.arange(self.next_id, self.next_id + len(spawn), dtype=np.int32)
+            self.next_id += len(spawn)
+            track_ids[spawn] = new_ids
+            self.boxes = np.concatenate([self.boxes, boxes[spawn]])
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.hits = np.concatenate([self.hits, np.ones(len(spawn), dtype=np.int32)])
+            self.misses = np.concatenate([self.misses, np.zeros(len(spawn), dtype=np.int32)])
+            if min_hits <= 1:
+                newly_confirmed.extend(new_ids.tolist())
+
+        # Drop tracks that have been missing for too long
+        alive = self.misses <= max_age
+        if not alive.all():
+            self.boxes = self.boxes[alive]
+            self.ids = self.ids[alive]
+            self.hits = self.hits[alive]
+            self.misses = self.misses[alive]
+
+        return track_ids.tolist(), newly_confirmed
+
+
+class TrackerRegistry:
+    """Keeps one ``StreamTracker`` per stream id, evicting idle streams LRU."""
+
+    def __init__(self, max_streams=10000, idle_ttl=600):
+        self.max_streams = max_streams
+        self.idle_ttl = idle_ttl
+        self._streams = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._streams)
+
+    def get(self, stream_id):
+        """Return the tracker for ``stream_id``, creating it if needed."""
+        with self._lock:
+            tracker = self._streams.get(stream_id)
+            if tracker is None:
+                tracker = StreamTracker()
+                self._streams[stream_id] = tracker
+            else:
+                self._streams.move_to_end(stream_id)
+            tracker.last_seen = time.monotonic()
+            self._evict()
+            return tracker
+
+    def drop(self, stream_id):
+        with self._lock:
+            return self._streams.pop(stream_id, None) is not None
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._streams:
+            oldest_id, oldest = next(iter(self._streams.items()))
+            if len(self._streams) <= self.max_streams and oldest.last_seen >= cutoff:
+                break
+            del self._streams[oldest_id]